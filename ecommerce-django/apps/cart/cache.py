@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from apps.products.cache import get_price_version
+
+
+CART_CACHE_ALIAS = getattr(settings, 'CART_CACHE_ALIAS', 'default')
+CART_SUMMARY_CACHE_TIMEOUT = getattr(settings, 'CART_SUMMARY_CACHE_TIMEOUT', 60 * 60)
+
+EMPTY_TOTALS = {'total_items': 0, 'total': Decimal('0')}
+
+
+def get_cache():
+    return caches[CART_CACHE_ALIAS]
+
+
+def _summary_key(cart_id):
+    # Price and discount changes (and product deletes) bump the price version
+    # and retire every summary; other product or category edits leave them
+    return f'cart:summary:{cart_id}:v{get_price_version()}'
+
+
+def get_cart_summary(cart):
+    """
+    Item count and total for the header badge. Served from the cache and
+    recomputed with one aggregate query when the record is missing.
+    """
+    if cart._state.adding:
+        return {'id': None, **EMPTY_TOTALS}
+
+    summary = get_cache().get(_summary_key(cart.id))
+    if summary is None:
+        summary = refresh_cart_summary(cart)
+    return summary
+
+
+def refresh_cart_summary(cart, totals=None):
+    """
+    Write-through after a cart mutation. Pass `totals` when they are already
+    known (prefetched cart, emptied cart) to skip the aggregate query. The
+    cache is written once the surrounding transaction commits, so a rollback
+    leaves the previous record in place.
+    """
+    totals = totals or cart.get_totals()
+    summary = {
+        'id': cart.id,
+        'total_items': totals['total_items'],
+        'total': totals['total'],
+    }
+    transaction.on_commit(
+        lambda: get_cache().set(_summary_key(cart.id), summary, CART_SUMMARY_CACHE_TIMEOUT)
+    )
+    return summary
+
+
+def invalidate_cart_summary(cart_id):
+    transaction.on_commit(lambda: get_cache().delete(_summary_key(cart_id)))
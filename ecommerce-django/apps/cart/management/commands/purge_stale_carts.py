@@ -0,0 +1,117 @@
+import time
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.cart.models import Cart, CartItem
+
+
+CART_IDLE_DAYS = getattr(settings, 'CART_IDLE_DAYS', 30)
+
+
+def stale_carts(cutoff):
+    """Anonymous carts with no cart or item activity since `cutoff`"""
+    recent_items = CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=cutoff)
+    return Cart.objects.filter(user__isnull=True, updated_at__lt=cutoff).exclude(Exists(recent_items))
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete anonymous carts (and their items) idle for longer than --days, "
+        "plus expired sessions, in small batches with one short transaction each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=float,
+            default=CART_IDLE_DAYS,
+            help=f'Idle age after which an anonymous cart is deleted (default: {CART_IDLE_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Carts deleted per transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches to leave room for other writers'
+        )
+        parser.add_argument(
+            '--skip-sessions',
+            action='store_true',
+            help='Do not delete expired sessions'
+        )
+        parser.add_argument(
+            '--every',
+            type=float,
+            help='Keep running and purge again every N seconds'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        if not options['every']:
+            self.purge(options)
+            return
+
+        try:
+            while True:
+                self.purge(options)
+                time.sleep(options['every'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
+
+    def purge(self, options):
+        started = time.perf_counter()
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        carts = self.delete_in_batches(lambda: stale_carts(cutoff), Cart, options)
+
+        sessions = 0
+        if not options['skip_sessions']:
+            sessions = self.purge_sessions(options)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {carts} stale cart(s) and {sessions} expired session(s) "
+            f"in {time.perf_counter() - started:.2f}s."
+        ))
+
+    def delete_in_batches(self, queryset_factory, model, options):
+        """
+        Delete matching rows `batch_size` at a time. Each batch re-applies the
+        filter inside its transaction, so rows that became active meanwhile
+        are kept.
+        """
+        deleted = 0
+        while True:
+            ids = list(queryset_factory().order_by().values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                return deleted
+
+            with transaction.atomic():
+                _, per_model = queryset_factory().filter(pk__in=ids).delete()
+            deleted += per_model.get(model._meta.label, 0)
+
+            if options['pause']:
+                time.sleep(options['pause'])
+
+    def purge_sessions(self, options):
+        engine = import_module(settings.SESSION_ENGINE)
+        if settings.SESSION_ENGINE not in ('django.contrib.sessions.backends.db',
+                                           'django.contrib.sessions.backends.cached_db'):
+            # Cache/file/cookie backends expire on their own or in one call
+            engine.SessionStore.clear_expired()
+            return 0
+
+        now = timezone.now()
+        return self.delete_in_batches(lambda: Session.objects.filter(expire_date__lt=now), Session, options)
@@ -1,4 +1,6 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
 from django.conf import settings
 import uuid
 
@@ -24,31 +26,79 @@ class Cart(models.Model):
     class Meta:
         db_table = 'carts'
         ordering = ['-created_at']
+        indexes = [
+            # Session cart lookup on every anonymous cart request
+            models.Index(fields=['session_key'], name='cart_session_key_idx'),
+            # Idle anonymous carts scanned by purge_stale_carts
+            models.Index(
+                fields=['updated_at'],
+                name='cart_anonymous_updated_idx',
+                condition=Q(user__isnull=True)
+            ),
+        ]
     
     def __str__(self):
         if self.user:
             return f"Cart for {self.user.email}"
         return f"Anonymous Cart {self.id}"
     
+    def get_totals(self):
+        """
+        Compute all cart totals in one pass.
+        Uses prefetched items when available, otherwise a single aggregate query.
+        """
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            items = self.items.all()
+            total_items = sum(item.quantity for item in items)
+            subtotal = sum((item.quantity * item.original_price for item in items), Decimal('0'))
+            total_discount = sum((item.discount_amount for item in items), Decimal('0'))
+        else:
+            money = DecimalField(max_digits=12, decimal_places=2)
+            on_sale = Q(
+                product__discount_price__isnull=False,
+                product__discount_price__lt=F('product__price')
+            )
+            totals = self.items.aggregate(
+                total_items=Sum('quantity'),
+                subtotal=Sum(F('quantity') * F('product__price'), output_field=money),
+                total_discount=Sum(
+                    Case(
+                        When(on_sale, then=F('quantity') * (F('product__price') - F('product__discount_price'))),
+                        default=Value(0),
+                        output_field=money
+                    )
+                )
+            )
+            total_items = totals['total_items'] or 0
+            subtotal = totals['subtotal'] or Decimal('0')
+            total_discount = totals['total_discount'] or Decimal('0')
+
+        return {
+            'total_items': total_items,
+            'subtotal': subtotal,
+            'total_discount': total_discount,
+            'total': subtotal - total_discount,
+        }
+
     @property
     def total_items(self):
         """Get total number of items in cart"""
-        return sum(item.quantity for item in self.items.all())
+        return self.get_totals()['total_items']
     
     @property
     def subtotal(self):
         """Get cart subtotal before discounts"""
-        return sum(item.subtotal for item in self.items.all())
+        return self.get_totals()['subtotal']
     
     @property
     def total_discount(self):
         """Get total discount amount"""
-        return sum(item.discount_amount for item in self.items.all())
+        return self.get_totals()['total_discount']
     
     @property
     def total(self):
         """Get cart total after discounts"""
-        return self.subtotal - self.total_discount
+        return self.get_totals()['total']
     
     def clear(self):
         """Remove all items from cart"""
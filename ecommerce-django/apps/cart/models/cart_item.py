@@ -51,7 +51,7 @@ class CartItem(models.Model):
     @property
     def discount_amount(self):
         """Get discount amount for this item"""
-        if self.product.discount_price:
+        if self.product.is_on_sale:
             return self.quantity * (self.product.price - self.product.discount_price)
         return 0
     
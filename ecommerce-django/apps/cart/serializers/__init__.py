@@ -2,7 +2,8 @@ from .cart import CartSerializer, CartSummarySerializer
 from .cart_item import (
     CartItemSerializer,
     CartItemCreateSerializer,
-    CartItemUpdateSerializer
+    CartItemUpdateSerializer,
+    CartItemBatchSerializer
 )
 
 __all__ = [
@@ -10,5 +11,6 @@ __all__ = [
     'CartSummarySerializer',
     'CartItemSerializer',
     'CartItemCreateSerializer',
-    'CartItemUpdateSerializer'
+    'CartItemUpdateSerializer',
+    'CartItemBatchSerializer'
 ]
\ No newline at end of file
@@ -3,6 +3,13 @@ from apps.cart.models import Cart
 from .cart_item import CartItemSerializer
 
 
+def hide_virtual_cart_id(instance, data):
+    """An unsaved cart has no stable id until its first item is added"""
+    if instance._state.adding:
+        data['id'] = None
+    return data
+
+
 class CartSerializer(serializers.ModelSerializer):
     """Serializer for reading cart"""
     
@@ -26,13 +33,13 @@ class CartSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def to_representation(self, instance):
+        return hide_virtual_cart_id(instance, super().to_representation(instance))
+
 
-class CartSummarySerializer(serializers.ModelSerializer):
-    """Lightweight cart summary serializer"""
+class CartSummarySerializer(serializers.Serializer):
+    """Lightweight cart summary serializer, reads the cached summary record"""
     
+    id = serializers.UUIDField(allow_null=True, read_only=True)
     total_items = serializers.IntegerField(read_only=True)
     total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    
-    class Meta:
-        model = Cart
-        fields = ['id', 'total_items', 'total']
\ No newline at end of file
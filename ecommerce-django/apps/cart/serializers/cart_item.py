@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from django.db import connection
+from django.utils import timezone
 from apps.cart.models import CartItem
+from apps.cart.stock import reserve_stock, set_reserved_quantity
 from apps.products.models import Product
 from apps.products.serializers import ProductListSerializer
 
@@ -76,23 +79,9 @@ class CartItemCreateSerializer(serializers.ModelSerializer):
         product = validated_data['product']
         quantity = validated_data['quantity']
         
-        # Check if item already in cart
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            # Update quantity
-            cart_item.quantity += quantity
-            if cart_item.quantity > product.quantity:
-                raise serializers.ValidationError({
-                    'quantity': f"Cannot add more. Only {product.quantity} items available."
-                })
-            cart_item.save()
-        
-        return cart_item
+        # Atomic conditional increment, raises StockConflict (409) when stock is short
+        # and StockContention (409) when competing writers held the lock
+        return reserve_stock(cart, product, quantity)
 
 
 class CartItemUpdateSerializer(serializers.ModelSerializer):
@@ -113,4 +102,114 @@ class CartItemUpdateSerializer(serializers.ModelSerializer):
                 f"Only {product.quantity} items available in stock."
             )
         
-        return value
\ No newline at end of file
+        return value
+    
+    def update(self, instance, validated_data):
+        """Set the new quantity only if stock still covers it"""
+        if 'quantity' in validated_data:
+            return set_reserved_quantity(instance, validated_data['quantity'])
+        return instance
+
+
+class CartItemBatchOperationSerializer(serializers.Serializer):
+    """Single operation inside a batch cart mutation"""
+
+    ACTIONS = ['add', 'update', 'remove']
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs['action'] != 'remove':
+            quantity = attrs.get('quantity')
+            if quantity is None:
+                raise serializers.ValidationError({'quantity': 'Quantity is required.'})
+            if quantity <= 0:
+                raise serializers.ValidationError({'quantity': 'Quantity must be at least 1.'})
+        return attrs
+
+
+class CartItemBatchSerializer(serializers.Serializer):
+    """
+    Serializer for applying several add/update/remove operations at once.
+    Products and existing cart items are loaded with one query each and the
+    result is written with bulk_create/bulk_update and a single delete.
+    """
+
+    operations = CartItemBatchOperationSerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate(self, attrs):
+        cart = self.context['cart']
+        operations = attrs['operations']
+        product_ids = {operation['product_id'] for operation in operations}
+
+        products = Product.objects.filter(is_active=True)
+        if connection.features.has_select_for_update:
+            products = products.select_for_update()
+        products = products.in_bulk(product_ids)
+        items = {
+            item.product_id: item
+            for item in cart.items.filter(product_id__in=product_ids)
+        }
+
+        # Replay the operations in memory to get the final quantity per product
+        quantities = {product_id: item.quantity for product_id, item in items.items()}
+        errors = {}
+        for index, operation in enumerate(operations):
+            product_id = operation['product_id']
+            if operation['action'] == 'remove':
+                if not quantities.get(product_id):
+                    errors[str(index)] = f"Product {product_id} is not in cart."
+                quantities[product_id] = 0
+                continue
+
+            if product_id not in products:
+                errors[str(index)] = f"Product with ID {product_id} does not exist."
+                continue
+            if operation['action'] == 'add':
+                quantities[product_id] = quantities.get(product_id, 0) + operation['quantity']
+            else:
+                quantities[product_id] = operation['quantity']
+
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product and quantity > product.quantity:
+                errors[f'product_{product_id}'] = f"Only {product.quantity} items available in stock."
+
+        if errors:
+            raise serializers.ValidationError({'operations': errors})
+
+        attrs['quantities'] = quantities
+        attrs['items'] = items
+        return attrs
+
+    def create(self, validated_data):
+        cart = self.context['cart']
+        quantities = validated_data['quantities']
+        items = validated_data['items']
+        now = timezone.now()
+
+        to_create = []
+        to_update = []
+        to_remove = []
+        for product_id, quantity in quantities.items():
+            item = items.get(product_id)
+            if quantity == 0:
+                if item:
+                    to_remove.append(product_id)
+            elif item is None:
+                to_create.append(CartItem(cart=cart, product_id=product_id, quantity=quantity))
+            elif item.quantity != quantity:
+                item.quantity = quantity
+                item.updated_at = now
+                to_update.append(item)
+
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+        if to_remove:
+            cart.items.filter(product_id__in=to_remove).delete()
+
+        return cart
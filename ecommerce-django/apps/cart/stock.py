@@ -0,0 +1,107 @@
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import Exists, F, Subquery
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from apps.cart.models import CartItem
+from apps.products.models import Product
+
+
+class StockConflict(APIException):
+    """Raised when a cart quantity cannot be reserved against current stock"""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Not enough stock to reserve the requested quantity.'
+    default_code = 'stock_conflict'
+
+
+class StockContention(APIException):
+    """Raised when competing writers held the stock rows; retrying can succeed"""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The product is being updated by another request, please retry.'
+    default_code = 'stock_contention'
+
+
+# Lock timeouts, deadlocks and serialization failures on PostgreSQL
+LOCK_ERROR_CODES = {'55P03', '40P01', '40001'}
+
+
+def is_lock_contention(error):
+    """True for an OperationalError caused by competing writers, not a broken database"""
+    if getattr(error.__cause__, 'pgcode', None) in LOCK_ERROR_CODES:
+        return True
+    # SQLite: "database is locked" / "database table is locked"
+    return 'is locked' in str(error)
+
+
+def _lock_product(product_id):
+    """Serialize concurrent reservations on backends with row locks"""
+    if connection.features.has_select_for_update:
+        list(Product.objects.select_for_update().filter(pk=product_id).values_list('pk'))
+
+
+def _stock(product_id):
+    return Subquery(Product.objects.filter(pk=product_id).values('quantity')[:1])
+
+
+def reserve_stock(cart, product, quantity):
+    """
+    Add `quantity` of `product` to `cart` without lost updates or oversell.
+
+    The cart line is incremented with a single conditional UPDATE
+    (quantity + n <= stock) and created when missing; concurrent creation
+    of the same line falls back to the conditional update.
+    """
+    try:
+        with transaction.atomic():
+            _lock_product(product.pk)
+
+            for attempt in range(2):
+                updated = CartItem.objects.filter(
+                    cart=cart,
+                    product=product,
+                    quantity__lte=_stock(product.pk) - quantity
+                ).update(quantity=F('quantity') + quantity, updated_at=timezone.now())
+                if updated:
+                    return CartItem.objects.select_related('product').get(cart=cart, product=product)
+
+                if CartItem.objects.filter(cart=cart, product=product).exists():
+                    break
+                if not Product.objects.filter(pk=product.pk, quantity__gte=quantity).exists():
+                    break
+
+                try:
+                    with transaction.atomic():
+                        return CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+                except IntegrityError:
+                    # Another request created the line first, retry as an increment
+                    continue
+    except OperationalError as error:
+        if not is_lock_contention(error):
+            raise
+        raise StockContention()
+
+    raise StockConflict()
+
+
+def set_reserved_quantity(cart_item, quantity):
+    """Set a cart line to `quantity` only if stock still covers it"""
+    try:
+        with transaction.atomic():
+            _lock_product(cart_item.product_id)
+            updated = CartItem.objects.filter(
+                Exists(Product.objects.filter(pk=cart_item.product_id, quantity__gte=quantity)),
+                pk=cart_item.pk
+            ).update(quantity=quantity, updated_at=timezone.now())
+    except OperationalError as error:
+        if not is_lock_contention(error):
+            raise
+        raise StockContention()
+
+    if not updated:
+        raise StockConflict()
+
+    cart_item.refresh_from_db()
+    return cart_item
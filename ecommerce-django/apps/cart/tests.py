@@ -1,3 +1,547 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.cart.cache import refresh_cart_summary
+from apps.cart.models import Cart, CartItem
+from apps.cart.stock import StockConflict, StockContention, reserve_stock, set_reserved_quantity
+from apps.products.models import Category, Product, ProductImage
+
+User = get_user_model()
+
+
+class CartTestMixin:
+    """Helpers for building carts and products"""
+
+    def create_product(self, index, price='10.00', discount_price=None, quantity=50):
+        if not hasattr(self, 'category'):
+            self.category = Category.objects.create(name='General', slug='general')
+        product = Product.objects.create(
+            name=f'Product {index}',
+            slug=f'product-{index}',
+            sku=f'SKU-{index}',
+            description='Description',
+            price=Decimal(price),
+            discount_price=Decimal(discount_price) if discount_price else None,
+            quantity=quantity,
+            category=self.category
+        )
+        ProductImage.objects.create(product=product, image=f'products/{index}.jpg', is_primary=True)
+        return product
+
+    def create_user_client(self, username='shopper'):
+        user = User.objects.create(username=username)
+        client = APIClient()
+        client.force_authenticate(user)
+        return user, client
+
+    def failing_updates(self, message):
+        """Make every UPDATE on the default connection raise OperationalError(message)"""
+        def execute(execute, sql, params, many, context):
+            if sql.startswith('UPDATE'):
+                raise OperationalError(message)
+            return execute(sql, params, many, context)
+        return connection.execute_wrapper(execute)
+
+
+class CartTotalsTests(CartTestMixin, TestCase):
+
+    def setUp(self):
+        self.user, self.client = self.create_user_client()
+        self.cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=self.cart, product=self.create_product(0, '10.00'), quantity=2)
+        CartItem.objects.create(cart=self.cart, product=self.create_product(1, '20.00', '15.00'), quantity=3)
+
+    def test_aggregate_totals(self):
+        totals = Cart.objects.get(pk=self.cart.pk).get_totals()
+
+        self.assertEqual(totals['total_items'], 5)
+        self.assertEqual(totals['subtotal'], Decimal('80.00'))
+        self.assertEqual(totals['total_discount'], Decimal('15.00'))
+        self.assertEqual(totals['total'], Decimal('65.00'))
+
+    def test_aggregate_is_a_single_query(self):
+        cart = Cart.objects.get(pk=self.cart.pk)
+        with self.assertNumQueries(1):
+            cart.get_totals()
+
+    def test_prefetched_totals_match_aggregate(self):
+        aggregate = Cart.objects.get(pk=self.cart.pk).get_totals()
+        cart = Cart.objects.prefetch_related('items__product').get(pk=self.cart.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(cart.get_totals(), aggregate)
+
+    def test_empty_cart_totals(self):
+        cart = Cart.objects.create()
+
+        self.assertEqual(cart.total_items, 0)
+        self.assertEqual(cart.total, Decimal('0'))
+
+    def test_cart_endpoint_totals(self):
+        response = self.client.get('/api/v1/cart/')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        self.assertEqual(len(data['items']), 2)
+        self.assertEqual(data['total_items'], 5)
+        self.assertEqual(Decimal(data['total']), Decimal('65.00'))
+
+    def test_cart_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/v1/cart/')
+
+        for index in range(2, 12):
+            CartItem.objects.create(cart=self.cart, product=self.create_product(index), quantity=1)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/v1/cart/')
+
+        self.assertEqual(len(response.data['data']['items']), 12)
+        self.assertEqual(len(small), len(large))
+
+    def test_summary_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/v1/cart/summary/')
+
+        for index in range(2, 12):
+            CartItem.objects.create(cart=self.cart, product=self.create_product(index), quantity=1)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/v1/cart/summary/')
+
+        self.assertEqual(response.data['data']['total_items'], 15)
+        self.assertEqual(len(small), len(large))
+
+
+class CartBatchTests(CartTestMixin, TestCase):
+
+    def setUp(self):
+        self.user, self.client = self.create_user_client()
+        self.cart = Cart.objects.create(user=self.user)
+        self.kept = self.create_product(0, quantity=5)
+        self.removed = self.create_product(1)
+        self.added = self.create_product(2, quantity=3)
+        CartItem.objects.create(cart=self.cart, product=self.kept, quantity=1)
+        CartItem.objects.create(cart=self.cart, product=self.removed, quantity=1)
+
+    def post_batch(self, operations):
+        return self.client.post('/api/v1/cart/batch/', {'operations': operations}, format='json')
+
+    def quantities(self):
+        return dict(self.cart.items.values_list('product_id', 'quantity'))
+
+    def test_batch_applies_all_operations(self):
+        response = self.post_batch([
+            {'action': 'add', 'product_id': self.added.pk, 'quantity': 2},
+            {'action': 'add', 'product_id': self.kept.pk, 'quantity': 1},
+            {'action': 'update', 'product_id': self.kept.pk, 'quantity': 4},
+            {'action': 'remove', 'product_id': self.removed.pk},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {self.kept.pk: 4, self.added.pk: 2})
+        self.assertEqual(response.data['data']['total_items'], 6)
+
+    def test_stock_error_applies_nothing(self):
+        response = self.post_batch([
+            {'action': 'remove', 'product_id': self.removed.pk},
+            {'action': 'add', 'product_id': self.added.pk, 'quantity': 2},
+            {'action': 'add', 'product_id': self.added.pk, 'quantity': 2},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.quantities(), {self.kept.pk: 1, self.removed.pk: 1})
+
+    def test_unknown_product_is_rejected(self):
+        response = self.post_batch([{'action': 'add', 'product_id': 9999, 'quantity': 1}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('0', response.data['operations'])
+
+    def test_batch_query_count_is_constant(self):
+        products = [self.create_product(index) for index in range(10, 30)]
+
+        with CaptureQueriesContext(connection) as small:
+            self.post_batch([{'action': 'add', 'product_id': products[0].pk, 'quantity': 1}])
+        with CaptureQueriesContext(connection) as large:
+            self.post_batch([
+                {'action': 'add', 'product_id': product.pk, 'quantity': 1}
+                for product in products[1:]
+            ])
+
+        self.assertEqual(len(small), len(large))
+
+
+class CartMergeTests(CartTestMixin, TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='shopper')
+        self.client = APIClient()
+        self.client.force_login(self.user)
+        self.anonymous_cart = Cart.objects.create(session_key=self.client.session.session_key)
+        self.user_cart = Cart.objects.create(user=self.user)
+
+    def fill_anonymous_cart(self, count, start=0):
+        for index in range(start, start + count):
+            product = self.create_product(index)
+            CartItem.objects.create(cart=self.anonymous_cart, product=product, quantity=2)
+
+    def test_merge_combines_and_clamps(self):
+        shared = self.create_product(0, quantity=4)
+        moved = self.create_product(1, quantity=1)
+        CartItem.objects.create(cart=self.user_cart, product=shared, quantity=3)
+        CartItem.objects.create(cart=self.anonymous_cart, product=shared, quantity=3)
+        CartItem.objects.create(cart=self.anonymous_cart, product=moved, quantity=1)
+
+        response = self.client.post('/api/v1/cart/merge/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(self.user_cart.items.values_list('product_id', 'quantity')),
+            {shared.pk: 4, moved.pk: 1}
+        )
+        self.assertFalse(Cart.objects.filter(pk=self.anonymous_cart.pk).exists())
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_merge_query_count_is_constant(self):
+        self.fill_anonymous_cart(5)
+        with CaptureQueriesContext(connection) as small:
+            self.client.post('/api/v1/cart/merge/')
+
+        self.anonymous_cart = Cart.objects.create(session_key=self.client.session.session_key)
+        self.fill_anonymous_cart(50, start=100)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post('/api/v1/cart/merge/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user_cart.items.count(), 55)
+        self.assertEqual(len(small), len(large))
+
+
+class StockReservationTests(CartTestMixin, TestCase):
+
+    def setUp(self):
+        self.user, self.client = self.create_user_client()
+        self.cart = Cart.objects.create(user=self.user)
+        self.product = self.create_product(0, quantity=5)
+
+    def add(self, quantity):
+        return self.client.post(
+            '/api/v1/cart/add/',
+            {'product_id': self.product.pk, 'quantity': quantity},
+            format='json'
+        )
+
+    def test_add_increments_existing_line(self):
+        self.add(2)
+        response = self.add(3)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.cart.items.get().quantity, 5)
+
+    def test_add_beyond_stock_conflicts(self):
+        self.add(4)
+        response = self.add(2)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.cart.items.get().quantity, 4)
+
+    def test_update_checks_current_stock(self):
+        self.add(1)
+        item = self.cart.items.get()
+        # Stock drops after the serializer validated against the old value
+        Product.objects.filter(pk=self.product.pk).update(quantity=2)
+
+        with self.assertRaises(StockConflict):
+            set_reserved_quantity(item, 3)
+        self.assertEqual(set_reserved_quantity(item, 2).quantity, 2)
+
+    def test_lock_errors_are_reported_as_contention(self):
+        self.add(1)
+        item = self.cart.items.get()
+
+        with self.failing_updates('database is locked'):
+            with self.assertRaises(StockContention):
+                set_reserved_quantity(item, 2)
+            with self.assertRaises(StockContention):
+                reserve_stock(self.cart, self.product, 1)
+            response = self.add(1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['detail'].code, 'stock_contention')
+        with self.failing_updates('disk I/O error'):
+            with self.assertRaises(OperationalError):
+                set_reserved_quantity(item, 2)
+            with self.assertRaises(OperationalError):
+                reserve_stock(self.cart, self.product, 1)
+
+
+class StockReservationConcurrencyTests(CartTestMixin, TransactionTestCase):
+
+    def test_concurrent_adds_never_oversell(self):
+        stock = 10
+        product = self.create_product(0, quantity=stock)
+        cart = Cart.objects.create()
+        results = []
+        barrier = threading.Barrier(20)
+
+        def worker():
+            try:
+                barrier.wait()
+                # Retry lock contention until stock gives a real answer
+                for attempt in range(500):
+                    try:
+                        reserve_stock(cart, product, 1)
+                        results.append(True)
+                        return
+                    except StockContention:
+                        time.sleep(0.005)
+                    except StockConflict:
+                        results.append(False)
+                        return
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reserved = CartItem.objects.get(cart=cart, product=product).quantity
+        self.assertEqual(len(results), 20)
+        # Stock ran out exactly: no oversell and no lost reservations
+        self.assertEqual(reserved, stock)
+        self.assertEqual(results.count(True), stock)
+
+
+class LazyCartTests(CartTestMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.product = self.create_product(0)
+
+    def test_anonymous_reads_do_not_write(self):
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(25):
+                cart = self.client.get('/api/v1/cart/')
+                summary = self.client.get('/api/v1/cart/summary/')
+
+        self.assertEqual(cart.status_code, 200)
+        self.assertEqual(cart.data['data']['items'], [])
+        self.assertEqual(cart.data['data']['total_items'], 0)
+        self.assertEqual(summary.data['data']['total_items'], 0)
+        writes = [
+            query['sql'] for query in context
+            if query['sql'].split(' ', 1)[0] in ('INSERT', 'UPDATE', 'DELETE')
+        ]
+        self.assertEqual(writes, [])
+        self.assertEqual(len(context), 0)
+        self.assertNotIn('sessionid', self.client.cookies)
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(Session.objects.exists())
+
+    def test_first_mutation_materializes_the_cart(self):
+        self.client.delete('/api/v1/cart/clear/')
+        self.assertFalse(Cart.objects.exists())
+
+        response = self.client.post(
+            '/api/v1/cart/add/',
+            {'product_id': self.product.pk, 'quantity': 2},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Cart.objects.count(), 1)
+        self.assertIn('sessionid', self.client.cookies)
+        self.assertEqual(self.client.get('/api/v1/cart/').data['data']['total_items'], 2)
+
+    def test_authenticated_read_does_not_create_cart(self):
+        user, client = self.create_user_client()
+
+        response = client.get('/api/v1/cart/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Cart.objects.filter(user=user).exists())
+
+    def test_removing_from_missing_cart_is_not_found(self):
+        response = self.client.delete('/api/v1/cart/remove/1/')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Cart.objects.exists())
+
+
+class PurgeStaleCartsTests(CartTestMixin, TestCase):
+
+    def setUp(self):
+        self.product = self.create_product(0)
+        self.old = timezone.now() - timedelta(days=40)
+
+    def create_cart(self, age=None, item_age=None, **kwargs):
+        cart = Cart.objects.create(session_key='session', **kwargs)
+        if item_age is not None:
+            item = CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+            CartItem.objects.filter(pk=item.pk).update(updated_at=item_age)
+        if age is not None:
+            Cart.objects.filter(pk=cart.pk).update(updated_at=age)
+        return cart
+
+    def purge(self, **options):
+        output = StringIO()
+        call_command('purge_stale_carts', stdout=output, **options)
+        return output.getvalue()
+
+    def test_only_idle_anonymous_carts_are_deleted(self):
+        stale = [self.create_cart(self.old, self.old) for _ in range(5)]
+        active = self.create_cart()
+        recently_touched = self.create_cart(self.old, timezone.now())
+        user_cart = self.create_cart(self.old, self.old, user=User.objects.create(username='shopper'))
+
+        output = self.purge(batch_size=2)
+
+        self.assertIn('Deleted 5 stale cart(s)', output)
+        self.assertEqual(
+            set(Cart.objects.values_list('pk', flat=True)),
+            {active.pk, recently_touched.pk, user_cart.pk}
+        )
+        self.assertFalse(CartItem.objects.filter(cart__in=stale).exists())
+
+    def test_deletes_in_bounded_batches(self):
+        for _ in range(6):
+            self.create_cart(self.old, self.old)
+
+        with CaptureQueriesContext(connection) as context:
+            self.purge(batch_size=3, skip_sessions=True)
+
+        self.assertFalse(Cart.objects.exists())
+        deletes = [query for query in context if query['sql'].startswith('DELETE FROM "carts"')]
+        self.assertEqual(len(deletes), 2)
+
+    def test_expired_sessions_are_deleted(self):
+        Session.objects.create(session_key='expired', session_data='', expire_date=self.old)
+        Session.objects.create(
+            session_key='live', session_data='', expire_date=timezone.now() + timedelta(days=1)
+        )
+
+        output = self.purge()
+
+        self.assertIn('1 expired session(s)', output)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+
+class CartSummaryCacheTests(CartTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.client = self.create_user_client()
+        self.first = self.create_product(0, '10.00')
+        self.second = self.create_product(1, '20.00', '15.00')
+
+    def summary(self):
+        # Cache writes wait for the commit, which TestCase only simulates
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get('/api/v1/cart/summary/')
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        return data['total_items'], Decimal(data['total'])
+
+    def assert_summary_matches_database(self):
+        totals = Cart.objects.get(user=self.user).get_totals()
+        self.assertEqual(self.summary(), (totals['total_items'], totals['total']))
+
+    def add(self, product, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                '/api/v1/cart/add/', {'product_id': product.pk, 'quantity': quantity}, format='json'
+            )
+
+    def test_summary_is_served_from_cache(self):
+        self.add(self.first, 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.summary(), (2, Decimal('20.00')))
+
+    def test_every_mutation_writes_through(self):
+        self.add(self.first, 2)
+        self.assert_summary_matches_database()
+        self.add(self.second, 1)
+        self.assert_summary_matches_database()
+
+        item = CartItem.objects.get(product=self.first)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/v1/cart/update/{item.pk}/', {'quantity': 5}, format='json')
+        self.assertEqual(self.summary(), (6, Decimal('65.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/v1/cart/remove/{item.pk}/')
+        self.assertEqual(self.summary(), (1, Decimal('15.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/v1/cart/batch/', {'operations': [
+                {'action': 'add', 'product_id': self.first.pk, 'quantity': 3},
+            ]}, format='json')
+        self.assertEqual(self.summary(), (4, Decimal('45.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete('/api/v1/cart/clear/')
+        self.assertEqual(self.summary(), (0, Decimal('0')))
+
+    def test_merge_writes_through(self):
+        self.add(self.first, 1)
+        client = APIClient()
+        client.force_login(self.user)
+        anonymous = Cart.objects.create(session_key=client.session.session_key)
+        CartItem.objects.create(cart=anonymous, product=self.second, quantity=2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/v1/cart/merge/')
+
+        self.assertEqual(self.summary(), (3, Decimal('40.00')))
+
+    def test_cache_miss_recomputes_from_database(self):
+        self.add(self.first, 2)
+        CartItem.objects.filter(product=self.first).update(quantity=4)
+        cache.clear()
+
+        self.assertEqual(self.summary(), (4, Decimal('40.00')))
+
+    def test_price_change_retires_cached_summary(self):
+        self.add(self.first, 2)
+        self.first.price = Decimal('12.00')
+        self.first.save()
+
+        self.assertEqual(self.summary(), (2, Decimal('24.00')))
+
+    def test_other_product_changes_keep_cached_summary(self):
+        self.add(self.first, 2)
+        self.first.name = 'Renamed'
+        self.first.save()
+        self.first.category.name = 'Renamed'
+        self.first.category.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.summary(), (2, Decimal('20.00')))
+
+    def test_rolled_back_mutation_is_not_cached(self):
+        self.add(self.first, 2)
+        cart = Cart.objects.get(user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                CartItem.objects.filter(cart=cart).update(quantity=5)
+                refresh_cart_summary(cart)
+                transaction.set_rollback(True)
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.summary(), (2, Decimal('20.00')))
 
-# Create your tests here.
@@ -3,15 +3,39 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.db import transaction
+from django.utils import timezone
+from django.db.models import Prefetch, prefetch_related_objects
 
+from apps.cart.cache import EMPTY_TOTALS, get_cart_summary, invalidate_cart_summary, refresh_cart_summary
 from apps.cart.models import Cart, CartItem
 from apps.cart.serializers import (
     CartSerializer,
     CartSummarySerializer,
     CartItemSerializer,
     CartItemCreateSerializer,
-    CartItemUpdateSerializer
+    CartItemUpdateSerializer,
+    CartItemBatchSerializer
 )
+from apps.products.serializers.product import primary_image_prefetch
+
+
+def prefetch_cart_items(cart, with_product_details=True):
+    """
+    Load cart items and their products in a fixed number of queries so
+    totals and nested product data are served from memory.
+    """
+    if cart._state.adding:
+        # Virtual cart, nothing to load
+        cart._prefetched_objects_cache = {'items': CartItem.objects.none()}
+        return cart
+
+    items = CartItem.objects.select_related('product')
+    if with_product_details:
+        items = CartItem.objects.select_related('product__category').prefetch_related(
+            primary_image_prefetch('product__images')
+        )
+    prefetch_related_objects([cart], Prefetch('items', queryset=items))
+    return cart
 
 
 class CartViewSet(viewsets.ViewSet):
@@ -21,6 +45,7 @@ class CartViewSet(viewsets.ViewSet):
     Endpoints:
     - GET    /cart/              - Get current cart
     - POST   /cart/add/          - Add item to cart
+    - POST   /cart/batch/        - Apply several add/update/remove operations
     - PATCH  /cart/update/{id}/  - Update item quantity
     - DELETE /cart/remove/{id}/  - Remove item from cart
     - DELETE /cart/clear/        - Clear entire cart
@@ -29,23 +54,41 @@ class CartViewSet(viewsets.ViewSet):
     
     permission_classes = [AllowAny]
     
-    def get_cart(self, request):
-        """Get or create cart for current user/session"""
+    def get_cart(self, request, create=True):
+        """
+        Get the cart for the current user/session.
+
+        With create=False nothing is written: when no cart exists yet an
+        unsaved, empty cart is returned and no session is started. Carts
+        are only materialized by actions that change them.
+        """
         if request.user.is_authenticated:
-            cart, created = Cart.objects.get_or_create(user=request.user)
-        else:
+            if create:
+                cart, created = Cart.objects.get_or_create(user=request.user)
+                return cart
+            return Cart.objects.filter(user=request.user).first() or Cart(user=request.user)
+
+        session_key = request.session.session_key
+        if not session_key:
+            if not create:
+                return Cart()
+            request.session.create()
             session_key = request.session.session_key
-            if not session_key:
-                request.session.create()
-                session_key = request.session.session_key
-            
+
+        if create:
             cart, created = Cart.objects.get_or_create(session_key=session_key)
-        
-        return cart
+            return cart
+        return Cart.objects.filter(session_key=session_key).first() or Cart()
+
+    def get_cart_item(self, cart, item_id):
+        """Item of `cart`, or None when missing or the cart was never saved"""
+        if cart._state.adding:
+            return None
+        return CartItem.objects.filter(id=item_id, cart=cart).first()
     
     def list(self, request):
         """Get current cart with all items"""
-        cart = self.get_cart(request)
+        cart = prefetch_cart_items(self.get_cart(request, create=False))
         serializer = CartSerializer(cart)
         
         return Response({
@@ -56,8 +99,8 @@ class CartViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Get cart summary (item count and total)"""
-        cart = self.get_cart(request)
-        serializer = CartSummarySerializer(cart)
+        cart = self.get_cart(request, create=False)
+        serializer = CartSummarySerializer(get_cart_summary(cart))
         
         return Response({
             "success": True,
@@ -76,6 +119,7 @@ class CartViewSet(viewsets.ViewSet):
         )
         serializer.is_valid(raise_exception=True)
         cart_item = serializer.save()
+        refresh_cart_summary(cart)
         
         return Response({
             "success": True,
@@ -83,15 +127,35 @@ class CartViewSet(viewsets.ViewSet):
             "data": CartItemSerializer(cart_item).data
         }, status=status.HTTP_201_CREATED)
     
+    @action(detail=False, methods=['post'])
+    @transaction.atomic
+    def batch(self, request):
+        """Apply a list of add/update/remove operations in one transaction"""
+        cart = self.get_cart(request)
+        
+        serializer = CartItemBatchSerializer(
+            data=request.data,
+            context={'cart': cart, 'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        cart = prefetch_cart_items(cart)
+        refresh_cart_summary(cart, cart.get_totals())
+        
+        return Response({
+            "success": True,
+            "message": "Cart updated.",
+            "data": CartSerializer(cart).data
+        })
+    
     @action(detail=False, methods=['patch'], url_path='update/(?P<item_id>[^/.]+)')
     @transaction.atomic
     def update_item(self, request, item_id=None):
         """Update cart item quantity"""
-        cart = self.get_cart(request)
+        cart = self.get_cart(request, create=False)
         
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-        except CartItem.DoesNotExist:
+        cart_item = self.get_cart_item(cart, item_id)
+        if cart_item is None:
             return Response({
                 "success": False,
                 "message": "Item not found in cart."
@@ -100,6 +164,7 @@ class CartViewSet(viewsets.ViewSet):
         serializer = CartItemUpdateSerializer(cart_item, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        refresh_cart_summary(cart)
         
         return Response({
             "success": True,
@@ -110,11 +175,10 @@ class CartViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['delete'], url_path='remove/(?P<item_id>[^/.]+)')
     def remove_item(self, request, item_id=None):
         """Remove item from cart"""
-        cart = self.get_cart(request)
+        cart = self.get_cart(request, create=False)
         
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-        except CartItem.DoesNotExist:
+        cart_item = self.get_cart_item(cart, item_id)
+        if cart_item is None:
             return Response({
                 "success": False,
                 "message": "Item not found in cart."
@@ -122,6 +186,7 @@ class CartViewSet(viewsets.ViewSet):
         
         product_name = cart_item.product.name
         cart_item.delete()
+        refresh_cart_summary(cart)
         
         return Response({
             "success": True,
@@ -131,9 +196,12 @@ class CartViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['delete'])
     def clear(self, request):
         """Clear all items from cart"""
-        cart = self.get_cart(request)
-        item_count = cart.items.count()
-        cart.clear()
+        cart = self.get_cart(request, create=False)
+        item_count = 0
+        if not cart._state.adding:
+            item_count = cart.items.count()
+            cart.clear()
+            refresh_cart_summary(cart, EMPTY_TOTALS)
         
         return Response({
             "success": True,
@@ -171,20 +239,48 @@ class CartViewSet(viewsets.ViewSet):
         # Get or create user cart
         user_cart, created = Cart.objects.get_or_create(user=request.user)
         
-        # Merge items
-        for item in anonymous_cart.items.all():
-            existing_item = user_cart.items.filter(product=item.product).first()
+        # Load both carts' items and their product stock in one query
+        items = CartItem.objects.filter(
+            cart__in=[anonymous_cart, user_cart]
+        ).select_related('product')
+        user_items = {}
+        anonymous_items = []
+        for item in items:
+            if item.cart_id == user_cart.id:
+                user_items[item.product_id] = item
+            else:
+                anonymous_items.append(item)
+        
+        # Merge in memory, clamping quantities to available stock
+        now = timezone.now()
+        to_update = []
+        for item in anonymous_items:
+            stock = item.product.quantity
+            existing_item = user_items.get(item.product_id)
             if existing_item:
-                existing_item.quantity += item.quantity
-                if existing_item.quantity > item.product.quantity:
-                    existing_item.quantity = item.product.quantity
-                existing_item.save()
+                quantity = min(existing_item.quantity + item.quantity, stock)
+                if quantity >= 1 and quantity != existing_item.quantity:
+                    existing_item.quantity = quantity
+                    existing_item.updated_at = now
+                    to_update.append(existing_item)
             else:
-                item.cart = user_cart
-                item.save()
+                quantity = min(item.quantity, stock)
+                if quantity >= 1:
+                    item.cart = user_cart
+                    item.quantity = quantity
+                    item.updated_at = now
+                    to_update.append(item)
         
-        # Delete anonymous cart
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ['cart', 'quantity', 'updated_at'])
+        
+        # Delete anonymous cart along with any items that were not moved
+        anonymous_cart_id = anonymous_cart.id
         anonymous_cart.delete()
+        invalidate_cart_summary(anonymous_cart_id)
+        
+        user_cart = prefetch_cart_items(user_cart)
+        refresh_cart_summary(user_cart, user_cart.get_totals())
         
         return Response({
             "success": True,
@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from apps.cart.cache import EMPTY_TOTALS, refresh_cart_summary
+from apps.cart.models import Cart, CartItem
+from apps.cart.stock import StockContention, is_lock_contention
+from apps.orders.models import Order, OrderItem
+from apps.products.cache import invalidate_product_details
+from apps.products.models import Product
+
+
+EMPTY_CART_MESSAGE = 'Your cart is empty.'
+
+
+class InsufficientStock(APIException):
+    """Raised when at least one cart line is no longer covered by stock"""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Some items in your cart are no longer available in the requested quantity.'
+    default_code = 'insufficient_stock'
+
+
+def get_current_cart(request):
+    """The request's cart, without creating one"""
+    if request.user.is_authenticated:
+        return Cart.objects.filter(user=request.user).first()
+    session_key = request.session.session_key
+    if not session_key:
+        return None
+    return Cart.objects.filter(session_key=session_key, user__isnull=True).first()
+
+
+def _decrement_stock(quantities):
+    """
+    Take every line's quantity off stock with one conditional UPDATE.
+    Returns the number of products that had enough stock.
+    """
+    requested = Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField()
+    )
+    return Product.objects.filter(
+        pk__in=list(quantities),
+        is_active=True,
+        quantity__gte=requested
+    ).update(quantity=F('quantity') - requested, updated_at=timezone.now())
+
+
+def checkout(cart, user=None):
+    """
+    Convert `cart` into an order in one transaction.
+
+    Prices are copied from the products as they are when the order is
+    placed. Stock is decremented for all lines at once and the whole
+    checkout rolls back if any line is short. The number of queries does
+    not depend on the number of lines.
+    """
+    try:
+        with transaction.atomic():
+            items = CartItem.objects.filter(cart=cart).select_related('product')
+            if connection.features.has_select_for_update_of:
+                # Keep prices and stock stable until the order is written
+                items = items.select_for_update(of=('product',))
+            items = list(items)
+            if not items:
+                raise ValidationError({'cart': EMPTY_CART_MESSAGE})
+
+            quantities = {item.product_id: item.quantity for item in items}
+            if _decrement_stock(quantities) != len(quantities):
+                raise InsufficientStock()
+
+            lines = [
+                OrderItem(
+                    product=item.product,
+                    product_name=item.product.name,
+                    sku=item.product.sku,
+                    quantity=item.quantity,
+                    original_price=item.product.price,
+                    unit_price=item.product.current_price
+                )
+                for item in items
+            ]
+            subtotal = sum((line.quantity * line.original_price for line in lines), Decimal('0'))
+            total = sum((line.subtotal for line in lines), Decimal('0'))
+            order = Order.objects.create(
+                user=user,
+                session_key=None if user else cart.session_key,
+                total_items=sum(line.quantity for line in lines),
+                subtotal=subtotal,
+                total_discount=subtotal - total,
+                total=total
+            )
+            for line in lines:
+                line.order = order
+            OrderItem.objects.bulk_create(lines)
+
+            CartItem.objects.filter(cart=cart).delete()
+    except OperationalError as error:
+        if not is_lock_contention(error):
+            raise
+        # Stock may well be there; another writer held the lock, so let the shopper retry
+        raise StockContention('Stock is being updated by another order, please retry.')
+
+    refresh_cart_summary(cart, EMPTY_TOTALS)
+    # Product details embed the stock level
+    invalidate_product_details(item.product.slug for item in items)
+    return order
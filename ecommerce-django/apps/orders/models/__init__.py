@@ -0,0 +1,4 @@
+from .order import Order
+from .order_item import OrderItem
+
+__all__ = ['Order', 'OrderItem']
@@ -0,0 +1,45 @@
+from django.db import models
+from django.conf import settings
+import uuid
+
+
+class Order(models.Model):
+    """
+    A checked out cart. Totals are snapshots taken at checkout and do not
+    follow later price changes.
+    """
+
+    class STATUS(models.TextChoices):
+        PENDING = 'Pending'
+        PAID = 'Paid'
+        SHIPPED = 'Shipped'
+        CANCELLED = 'Cancelled'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='orders'
+    )
+    session_key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default=STATUS.PENDING)
+
+    total_items = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    total_discount = models.DecimalField(max_digits=12, decimal_places=2)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'orders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order {self.id}"
@@ -0,0 +1,40 @@
+from django.db import models
+from apps.products.models import Product
+
+
+class OrderItem(models.Model):
+    """
+    One order line with the product details and prices copied at checkout.
+    """
+
+    order = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.CASCADE,
+        related_name='items'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='order_items'
+    )
+    product_name = models.CharField(max_length=255)
+    sku = models.CharField(max_length=50)
+    quantity = models.PositiveIntegerField()
+    original_price = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'order_items'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product_name}"
+
+    @property
+    def subtotal(self):
+        return self.quantity * self.unit_price
+
+    @property
+    def discount_amount(self):
+        return self.quantity * (self.original_price - self.unit_price)
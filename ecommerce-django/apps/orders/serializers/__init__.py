@@ -0,0 +1,3 @@
+from .order import OrderSerializer, OrderItemSerializer
+
+__all__ = ['OrderSerializer', 'OrderItemSerializer']
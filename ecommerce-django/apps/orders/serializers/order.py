@@ -0,0 +1,44 @@
+from rest_framework import serializers
+from apps.orders.models import Order, OrderItem
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    discount_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = [
+            'id',
+            'product',
+            'product_name',
+            'sku',
+            'quantity',
+            'original_price',
+            'unit_price',
+            'discount_amount',
+            'subtotal'
+        ]
+        read_only_fields = fields
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """Serializer for reading orders"""
+
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id',
+            'status',
+            'items',
+            'total_items',
+            'subtotal',
+            'total_discount',
+            'total',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = fields
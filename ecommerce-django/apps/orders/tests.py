@@ -1,3 +1,115 @@
+from decimal import Decimal
+
+from django.db import OperationalError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.cart.models import Cart, CartItem
+from apps.cart.tests import CartTestMixin
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product
+
+
+class CheckoutTests(CartTestMixin, TestCase):
+
+    def setUp(self):
+        self.user, self.client = self.create_user_client()
+        self.cart = Cart.objects.create(user=self.user)
+
+    def add(self, product, quantity):
+        return CartItem.objects.create(cart=self.cart, product=product, quantity=quantity)
+
+    def checkout(self):
+        return self.client.post('/api/v1/orders/checkout/')
+
+    def test_checkout_snapshots_cart(self):
+        regular = self.create_product(0, '10.00', quantity=5)
+        sale = self.create_product(1, '20.00', '15.00', quantity=5)
+        self.add(regular, 2)
+        self.add(sale, 3)
+
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.total_items, 5)
+        self.assertEqual(order.subtotal, Decimal('80.00'))
+        self.assertEqual(order.total_discount, Decimal('15.00'))
+        self.assertEqual(order.total, Decimal('65.00'))
+        self.assertEqual(
+            set(order.items.values_list('sku', 'quantity', 'unit_price')),
+            {('SKU-0', 2, Decimal('10.00')), ('SKU-1', 3, Decimal('15.00'))}
+        )
+        self.assertEqual(
+            dict(Product.objects.values_list('sku', 'quantity')),
+            {'SKU-0': 3, 'SKU-1': 2}
+        )
+        self.assertFalse(self.cart.items.exists())
+        self.assertEqual(len(response.data['data']['items']), 2)
+        self.assertEqual(self.client.get('/api/v1/cart/summary/').data['data']['total_items'], 0)
+
+    def test_prices_are_not_affected_by_later_changes(self):
+        product = self.create_product(0, '10.00')
+        self.add(product, 1)
+        self.checkout()
+
+        Product.objects.filter(pk=product.pk).update(price=Decimal('99.00'))
+
+        self.assertEqual(OrderItem.objects.get().unit_price, Decimal('10.00'))
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        available = self.create_product(0, quantity=5)
+        short = self.create_product(1, quantity=5)
+        self.add(available, 2)
+        self.add(short, 3)
+        # Stock drops after the item was added to the cart
+        Product.objects.filter(pk=short.pk).update(quantity=1)
+
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(dict(Product.objects.values_list('sku', 'quantity')), {'SKU-0': 5, 'SKU-1': 1})
+        self.assertEqual(self.cart.items.count(), 2)
+
+    def test_lock_errors_are_reported_as_contention(self):
+        self.add(self.create_product(0), 1)
+
+        with self.failing_updates('database is locked'):
+            response = self.checkout()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['detail'].code, 'stock_contention')
+        with self.failing_updates('disk I/O error'):
+            with self.assertRaises(OperationalError):
+                self.checkout()
+        self.assertFalse(Order.objects.exists())
+
+    def test_empty_cart_is_rejected(self):
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_checkout_query_count_is_constant(self):
+        self.add(self.create_product(0), 1)
+        with CaptureQueriesContext(connection) as small:
+            self.checkout()
+
+        for index in range(1, 30):
+            self.add(self.create_product(index), 2)
+        with CaptureQueriesContext(connection) as large:
+            response = self.checkout()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(len(small), len(large))
+
+    def test_orders_are_scoped_to_their_owner(self):
+        self.add(self.create_product(0), 1)
+        order_id = self.checkout().data['data']['id']
+
+        _, other = self.create_user_client('other')
 
-# Create your tests here.
+        self.assertEqual(len(self.client.get('/api/v1/orders/').data), 1)
+        self.assertEqual(other.get(f'/api/v1/orders/{order_id}/').status_code, 404)
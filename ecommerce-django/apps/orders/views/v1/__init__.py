@@ -0,0 +1,3 @@
+from .order import OrderViewSet
+
+__all__ = ['OrderViewSet']
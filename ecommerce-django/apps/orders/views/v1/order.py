@@ -0,0 +1,48 @@
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+
+from apps.orders.checkout import EMPTY_CART_MESSAGE, checkout, get_current_cart
+from apps.orders.models import Order
+from apps.orders.serializers import OrderSerializer
+
+
+class OrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Orders of the current user or anonymous session.
+
+    Endpoints:
+    - GET    /orders/            - List orders
+    - GET    /orders/{id}/       - Order details
+    - POST   /orders/checkout/   - Place an order from the current cart
+    """
+
+    serializer_class = OrderSerializer
+    permission_classes = [AllowAny]
+
+    def get_queryset(self):
+        queryset = Order.objects.prefetch_related('items')
+        if self.request.user.is_authenticated:
+            return queryset.filter(user=self.request.user)
+        session_key = self.request.session.session_key
+        if not session_key:
+            return queryset.none()
+        return queryset.filter(user__isnull=True, session_key=session_key)
+
+    @action(detail=False, methods=['post'])
+    def checkout(self, request):
+        """Snapshot the cart into an order, take the stock and empty the cart"""
+        cart = get_current_cart(request)
+        if cart is None:
+            raise ValidationError({'cart': EMPTY_CART_MESSAGE})
+
+        user = request.user if request.user.is_authenticated else None
+        order = checkout(cart, user=user)
+
+        return Response({
+            "success": True,
+            "message": "Order placed successfully.",
+            "data": OrderSerializer(order).data
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Any configured Django cache backend can be used, local memory by default
+PRODUCT_CACHE_ALIAS = getattr(settings, 'PRODUCT_CACHE_ALIAS', 'default')
+
+CATEGORY_TREE_CACHE_KEY = 'products:category_tree'
+CATEGORY_TREE_CACHE_TIMEOUT = getattr(settings, 'CATEGORY_TREE_CACHE_TIMEOUT', 60 * 60)
+
+PRODUCT_DETAIL_CACHE_TIMEOUT = getattr(settings, 'PRODUCT_DETAIL_CACHE_TIMEOUT', 5 * 60)
+CATALOG_VERSION_KEY = 'products:catalog_version'
+PRICE_VERSION_KEY = 'products:price_version'
+DETAIL_HITS_KEY = 'products:detail_hits'
+DETAIL_MISSES_KEY = 'products:detail_misses'
+
+
+def get_cache():
+    return caches[PRODUCT_CACHE_ALIAS]
+
+
+def get_category_tree():
+    return get_cache().get(CATEGORY_TREE_CACHE_KEY)
+
+
+def set_category_tree(tree):
+    get_cache().set(CATEGORY_TREE_CACHE_KEY, tree, CATEGORY_TREE_CACHE_TIMEOUT)
+
+
+def invalidate_category_tree():
+    get_cache().delete(CATEGORY_TREE_CACHE_KEY)
+
+
+def get_catalog_version():
+    """Version stamp shared by every cached product detail"""
+    return get_cache().get_or_set(CATALOG_VERSION_KEY, 1, None)
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def bump_catalog_version():
+    """Invalidate all cached product details at once"""
+    _bump(CATALOG_VERSION_KEY)
+
+
+def get_price_version():
+    """Version stamp for data derived from product prices, such as cart totals"""
+    return get_cache().get_or_set(PRICE_VERSION_KEY, 1, None)
+
+
+def bump_price_version():
+    """Called when a price, discount or a product row changes under existing carts"""
+    _bump(PRICE_VERSION_KEY)
+
+
+def _detail_version_key(slug):
+    return f'products:detail_version:{slug}'
+
+
+def _product_detail_key(slug, origin):
+    """
+    The payload holds absolute media URLs, so it is cached per scheme and
+    host. A per-slug stamp lets one product be invalidated for every origin.
+    """
+    version_key = _detail_version_key(slug)
+    versions = get_cache().get_many([CATALOG_VERSION_KEY, version_key])
+    catalog_version = versions.get(CATALOG_VERSION_KEY) or get_catalog_version()
+    return f'products:detail:{slug}:{origin}:v{catalog_version}.{versions.get(version_key, 0)}'
+
+
+def _increment(key):
+    cache = get_cache()
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_product_detail(slug, origin):
+    data = get_cache().get(_product_detail_key(slug, origin))
+    _increment(DETAIL_HITS_KEY if data is not None else DETAIL_MISSES_KEY)
+    return data
+
+
+def set_product_detail(slug, origin, data):
+    get_cache().set(_product_detail_key(slug, origin), data, PRODUCT_DETAIL_CACHE_TIMEOUT)
+
+
+def invalidate_product_detail(slug):
+    _increment(_detail_version_key(slug))
+
+
+def invalidate_product_details(slugs):
+    for slug in set(slugs):
+        invalidate_product_detail(slug)
+
+
+def get_product_detail_stats():
+    """Hit/miss counters for monitoring"""
+    cache = get_cache()
+    hits = cache.get(DETAIL_HITS_KEY, 0)
+    misses = cache.get(DETAIL_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 3) if total else None,
+    }
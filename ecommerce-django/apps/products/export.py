@@ -0,0 +1,69 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+
+# Same columns import_products reads, so an export can be re-imported as is
+EXPORT_FIELDS = [
+    'sku',
+    'name',
+    'slug',
+    'description',
+    'short_description',
+    'price',
+    'discount_price',
+    'quantity',
+    'stock_status',
+    'category',
+    'brand',
+    'weight',
+    'dimensions',
+    'is_active',
+    'is_featured',
+]
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Plain dict rows streamed from the database, no model instances"""
+    columns = [field for field in EXPORT_FIELDS if field != 'category']
+    rows = (
+        queryset.order_by('id')
+        .values(*columns, category_slug=F('category__slug'))
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        row['category'] = row.pop('category_slug')
+        yield row
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def render_jsonl(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode({field: row[field] for field in EXPORT_FIELDS}) + '\n'
+
+
+RENDERERS = {
+    'jsonl': render_jsonl,
+    'csv': render_csv,
+}
@@ -0,0 +1,250 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, F, Q, Value, When
+
+from apps.products.models import Category, FacetCount, Product
+
+
+FACETS = ['brand', 'category', 'stock_status', 'price', 'rating']
+
+# (label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [
+    ('0-25', Decimal('0'), Decimal('25')),
+    ('25-50', Decimal('25'), Decimal('50')),
+    ('50-100', Decimal('50'), Decimal('100')),
+    ('100-250', Decimal('100'), Decimal('250')),
+    ('250-500', Decimal('250'), Decimal('500')),
+    ('500+', Decimal('500'), None),
+]
+RATING_BUCKETS = ['1', '2', '3', '4', '5']
+
+# Product columns needed to place a product in its facet buckets
+STATE_FIELDS = [
+    'is_active', 'brand', 'category_id', 'stock_status',
+    'price', 'discount_price', 'rating_sum', 'rating_count',
+]
+
+
+def _current_price(state):
+    discount_price = state['discount_price']
+    if discount_price is not None and discount_price < state['price']:
+        return discount_price
+    return state['price']
+
+
+def price_bucket(price):
+    for label, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return label
+    return None
+
+
+def rating_bucket(rating_sum, rating_count):
+    """Whole-star bucket of the average rating, None when unrated"""
+    if not rating_count:
+        return None
+    return str(min(rating_sum // rating_count, 5))
+
+
+def facet_values(state):
+    """Facet value of every facet for one product state, or {} if inactive"""
+    if not state or not state['is_active']:
+        return {}
+    values = {
+        'brand': state['brand'] or None,
+        'category': str(state['category_id']),
+        'stock_status': state['stock_status'],
+        'price': price_bucket(_current_price(state)),
+        'rating': rating_bucket(state['rating_sum'], state['rating_count']),
+    }
+    return {facet: value for facet, value in values.items() if value is not None}
+
+
+def product_state(product):
+    return {field: getattr(product, field) for field in STATE_FIELDS}
+
+
+def apply_state_change(old_state, new_state):
+    """Move a product between facet buckets, touching only changed facets"""
+    old_values = facet_values(old_state)
+    new_values = facet_values(new_state)
+
+    deltas = Counter()
+    for facet in FACETS:
+        old_value = old_values.get(facet)
+        new_value = new_values.get(facet)
+        if old_value == new_value:
+            continue
+        if old_value is not None:
+            deltas[(facet, old_value)] -= 1
+        if new_value is not None:
+            deltas[(facet, new_value)] += 1
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        FacetCount.objects.bulk_create(
+            [FacetCount(facet=facet, value=value) for facet, value in deltas],
+            ignore_conflicts=True
+        )
+        for (facet, value), delta in deltas.items():
+            FacetCount.objects.filter(facet=facet, value=value).update(count=F('count') + delta)
+
+
+def rebuild_facet_counts():
+    """Recompute the whole facet table from the products, in bulk"""
+    counts = Counter()
+    for state in Product.objects.filter(is_active=True).values(*STATE_FIELDS).iterator(chunk_size=2000):
+        for facet, value in facet_values(state).items():
+            counts[(facet, value)] += 1
+
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(
+            [FacetCount(facet=facet, value=value, count=count) for (facet, value), count in counts.items()],
+            batch_size=500
+        )
+    return len(counts)
+
+
+# Filtering and on-demand counting
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+# ?category= already selects by slug, so the category facet filters by id
+FACET_PARAMS = {
+    'brand': 'brand',
+    'category': 'category_id',
+    'stock_status': 'stock_status',
+    'price': 'price',
+    'rating': 'rating',
+}
+
+
+def parse_facet_filters(params):
+    """Selected values per facet from query params such as ?brand=a,b&price=0-25"""
+    filters = {}
+    for facet in FACETS:
+        values = _split(params.get(FACET_PARAMS[facet], ''))
+        if not values:
+            continue
+        if facet == 'category':
+            # Ids that are not integers match no category
+            values = [value for value in values if value.isdigit()]
+        filters[facet] = values
+    return filters
+
+
+def _annotate_buckets(queryset):
+    current_price = Case(
+        When(
+            Q(discount_price__isnull=False, discount_price__lt=F('price')),
+            then=F('discount_price')
+        ),
+        default=F('price')
+    )
+    price_whens = []
+    for label, low, high in PRICE_BUCKETS:
+        condition = Q(facet_current_price__gte=low)
+        if high is not None:
+            condition &= Q(facet_current_price__lt=high)
+        price_whens.append(When(condition, then=Value(label)))
+
+    rating_whens = [
+        When(
+            Q(rating_count__gt=0)
+            & Q(rating_sum__gte=int(star) * F('rating_count'))
+            & Q(rating_sum__lt=(int(star) + 1) * F('rating_count')),
+            then=Value(star)
+        )
+        for star in RATING_BUCKETS[:-1]
+    ]
+    rating_whens.append(
+        When(Q(rating_count__gt=0, rating_sum__gte=5 * F('rating_count')), then=Value('5'))
+    )
+
+    return queryset.annotate(
+        facet_current_price=current_price
+    ).annotate(
+        facet_price=Case(*price_whens, default=Value(None), output_field=CharField()),
+        facet_rating=Case(*rating_whens, default=Value(None), output_field=CharField()),
+    )
+
+
+FACET_COLUMNS = {
+    'brand': 'brand',
+    'category': 'category_id',
+    'stock_status': 'stock_status',
+    'price': 'facet_price',
+    'rating': 'facet_rating',
+}
+
+
+def filter_by_facets(queryset, filters, exclude=None):
+    """Apply the selected values; values are OR-ed within a facet, facets are AND-ed"""
+    if not filters:
+        return queryset
+    queryset = _annotate_buckets(queryset)
+    for facet, values in filters.items():
+        if facet != exclude:
+            queryset = queryset.filter(**{f'{FACET_COLUMNS[facet]}__in': values})
+    return queryset
+
+
+def stored_facet_counts():
+    """Counts for the unfiltered active catalog, straight from the facet table"""
+    counts = {facet: {} for facet in FACETS}
+    for facet, value, count in FacetCount.objects.filter(count__gt=0).values_list('facet', 'value', 'count'):
+        counts[facet][value] = count
+    return counts
+
+
+def computed_facet_counts(queryset, filters):
+    """
+    Counts for a filtered catalog. Each facet ignores its own selection so
+    shoppers can see how many products every alternative would give.
+    """
+    counts = {}
+    for facet in FACETS:
+        column = FACET_COLUMNS[facet]
+        rows = (
+            _annotate_buckets(filter_by_facets(queryset, filters, exclude=facet))
+            .exclude(**{f'{column}__isnull': True})
+            .order_by()
+            .values(column)
+            .annotate(total=Count('id'))
+        )
+        counts[facet] = {
+            str(row[column]): row['total']
+            for row in rows
+            if row[column] != ''
+        }
+    return counts
+
+
+def describe_facets(counts):
+    """Shape counts for the API, with category names for category ids"""
+    category_ids = [int(value) for value in counts.get('category', {})]
+    categories = {
+        str(category.pk): category
+        for category in Category.objects.filter(pk__in=category_ids).only('id', 'name', 'slug')
+    }
+
+    result = {}
+    for facet in FACETS:
+        entries = []
+        for value, count in counts.get(facet, {}).items():
+            entry = {'value': value, 'count': count}
+            if facet == 'category' and value in categories:
+                entry['label'] = categories[value].name
+                entry['slug'] = categories[value].slug
+            entries.append(entry)
+        entries.sort(key=lambda entry: (-entry['count'], entry['value']))
+        result[facet] = entries
+    return result
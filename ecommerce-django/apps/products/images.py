@@ -0,0 +1,192 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from apps.products.cache import bump_catalog_version, invalidate_category_tree, invalidate_product_detail
+from apps.products.models import Category, Product, ProductImage
+
+logger = logging.getLogger(__name__)
+
+
+# Widths generated for every upload, never larger than the original
+IMAGE_DERIVATIVE_WIDTHS = getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', [160, 320, 640, 1280])
+IMAGE_DERIVATIVE_WORKERS = getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=IMAGE_DERIVATIVE_WORKERS,
+                thread_name_prefix='image-derivatives'
+            )
+        return _executor
+
+
+def needs_derivatives(instance):
+    """True when the stored variants were not generated from the current file"""
+    return bool(instance.image) and instance.variants.get('source') != instance.image.name
+
+
+def schedule_derivatives(instances):
+    """
+    Queue derivative generation once the surrounding transaction commits, so
+    the worker sees the saved row and the upload request is not blocked.
+    """
+    jobs = [(type(instance), instance.pk) for instance in instances if needs_derivatives(instance)]
+    if not jobs:
+        return
+
+    def submit():
+        for model, pk in jobs:
+            if getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+                get_executor().submit(_run_in_worker, model, pk)
+            else:
+                generate_derivatives(model, pk)
+
+    transaction.on_commit(submit)
+
+
+def _run_in_worker(model, pk):
+    try:
+        generate_derivatives(model, pk)
+    except Exception:
+        logger.exception("Generating image derivatives failed for %s %s", model.__name__, pk)
+    finally:
+        # Worker threads hold their own connections
+        close_old_connections()
+
+
+def _derivative_name(name, width, extension):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'derivatives', f'{stem}-{width}w.{extension}')
+
+
+def _encode(image, image_format, **options):
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def render_variants(field_file):
+    """
+    Resize the stored file to every configured width, writing a WebP and a
+    JPEG/PNG fallback next to the original. Returns {format: {width: name}}.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as handle:
+        original = ImageOps.exif_transpose(Image.open(handle))
+        original.load()
+
+    has_alpha = original.mode in ('RGBA', 'LA', 'P')
+    fallback = ('png', 'PNG', {}) if has_alpha else ('jpeg', 'JPEG', {'quality': JPEG_QUALITY})
+    original = original.convert('RGBA' if has_alpha else 'RGB')
+
+    widths = sorted({min(width, original.width) for width in IMAGE_DERIVATIVE_WIDTHS})
+    variants = {'webp': {}, fallback[0]: {}}
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.LANCZOS)
+        for extension, image_format, options in [('webp', 'WEBP', {'quality': WEBP_QUALITY}), fallback]:
+            name = _derivative_name(field_file.name, width, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            variants[extension][str(width)] = storage.save(name, _encode(resized, image_format, **options))
+    return variants
+
+
+def _derivative_names(variants):
+    return {
+        name
+        for image_format, names in (variants or {}).items()
+        if image_format != 'source'
+        for name in names.values()
+    }
+
+
+def delete_derivatives(storage, names):
+    for name in names:
+        if storage.exists(name):
+            storage.delete(name)
+
+
+def discard_derivatives(instance):
+    """Remove the derivative files of a deleted image once the delete commits"""
+    names = _derivative_names(instance.variants)
+    if names:
+        storage = instance.image.storage
+        transaction.on_commit(lambda: delete_derivatives(storage, names))
+
+
+def generate_derivatives(model, pk):
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not needs_derivatives(instance):
+        return None
+
+    source = instance.image.name
+    if not instance.image.storage.exists(source):
+        logger.info("Skipping image derivatives for %s %s, %s is missing", model.__name__, pk, source)
+        return None
+
+    previous = instance.variants
+    variants = render_variants(instance.image)
+    variants['source'] = source
+
+    # Only store them if the image was not replaced meanwhile
+    if model is ProductImage:
+        updated = ProductImage.objects.filter(pk=pk, image=source).update(variants=variants)
+        if updated:
+            # Variants are part of the product payload
+            Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+            invalidate_product_detail(instance.product.slug)
+    else:
+        updated = Category.objects.filter(pk=pk, image=source).update(
+            variants=variants,
+            updatedAt=timezone.now()
+        )
+        if updated:
+            invalidate_category_tree()
+            bump_catalog_version()
+
+    if updated:
+        # Files generated for the previous image are no longer referenced
+        delete_derivatives(instance.image.storage, _derivative_names(previous) - _derivative_names(variants))
+    else:
+        delete_derivatives(instance.image.storage, _derivative_names(variants))
+    return variants
+
+
+def build_srcset(instance, request=None):
+    """{format: "url 160w, url 320w"} for the generated variants of an image"""
+    variants = instance.variants or {}
+    if not instance.image or variants.get('source') != instance.image.name:
+        return {}
+
+    storage = instance.image.storage
+    srcset = {}
+    for image_format, names in variants.items():
+        if image_format == 'source':
+            continue
+        candidates = []
+        for width, name in sorted(names.items(), key=lambda item: int(item[0])):
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            candidates.append(f'{url} {width}w')
+        srcset[image_format] = ', '.join(candidates)
+    return srcset
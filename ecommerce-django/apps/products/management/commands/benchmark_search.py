@@ -0,0 +1,82 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.products.models import Category, Product
+from apps.products.search import fts_available, icontains_search, search_products
+
+
+WORDS = [
+    'wireless', 'bluetooth', 'cotton', 'leather', 'steel', 'ceramic', 'organic',
+    'portable', 'compact', 'premium', 'classic', 'vintage', 'smart', 'gaming',
+    'outdoor', 'kitchen', 'office', 'travel', 'kids', 'sports', 'headphones',
+    'speaker', 'jacket', 'backpack', 'lamp', 'mug', 'keyboard', 'monitor',
+    'camera', 'watch', 'bottle', 'chair', 'blender', 'charger', 'tent', 'sneakers',
+]
+# Filler vocabulary so common query words stay selective, as in a real catalog
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'tor', 'vex', 'zu', 'pra', 'dil', 'sho', 'nat', 'qui']
+FILLER = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay']
+QUERIES = ['wireless headphones', 'steel bottle', 'gaming key', 'vintage leather jacket', 'hooli', 'cam']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare FTS5 search with icontains scans on a synthetic catalog. "
+        "The catalog is created inside a transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query (default: 5)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError("The FTS5 search index requires the SQLite backend.")
+
+        random.seed(options['seed'])
+        with transaction.atomic():
+            self.populate(options['products'])
+            self.stdout.write(f"{'query':<26}{'fts5 ms':>10}{'icontains ms':>14}{'matches':>10}")
+            for query in QUERIES:
+                fts_ms, matches = self.measure(search_products, query, options['repeat'])
+                scan_ms, _ = self.measure(icontains_search, query, options['repeat'])
+                self.stdout.write(f"{query:<26}{fts_ms:>10.2f}{scan_ms:>14.2f}{matches:>10}")
+            transaction.set_rollback(True)
+
+    def populate(self, count):
+        category = Category.objects.create(name='Benchmark', slug='benchmark-search')
+        started = time.perf_counter()
+        batch = []
+        for index in range(count):
+            words = random.sample(WORDS, 3)
+            batch.append(Product(
+                name=' '.join(words).title(),
+                slug=f'benchmark-search-{index}',
+                sku=f'BENCH-{index}',
+                description=' '.join(random.choices(FILLER, k=30) + random.choices(WORDS, k=2)),
+                short_description=' '.join(random.choices(FILLER, k=8)),
+                brand=random.choice(BRANDS),
+                price=Decimal('9.99'),
+                category=category,
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Inserted {count} products in {elapsed:.1f}s")
+
+    def measure(self, search, query, repeat):
+        queryset = Product.objects.filter(is_active=True)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            matches = search(queryset, query).count()
+            list(search(queryset, query).values_list('id', flat=True)[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings), matches
@@ -0,0 +1,67 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.export import EXPORT_CHUNK_SIZE, RENDERERS, export_rows
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the catalog to a CSV or JSONL file. Rows are streamed from the "
+        "database in chunks, so memory use does not grow with the catalog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, or '-' for stdout")
+        parser.add_argument(
+            '--format',
+            choices=sorted(RENDERERS),
+            help='Output format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help=f'Rows fetched per database round trip (default: {EXPORT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--include-inactive',
+            action='store_true',
+            help='Export inactive products as well'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        output_format = options['format'] or Path(path).suffix.lstrip('.').lower()
+        if output_format not in RENDERERS:
+            raise CommandError("Unknown output format, pass --format csv or --format jsonl.")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        queryset = Product.objects.all()
+        if not options['include_inactive']:
+            queryset = queryset.filter(is_active=True)
+
+        counted = 0
+
+        def counting(rows):
+            nonlocal counted
+            for row in rows:
+                counted += 1
+                yield row
+
+        lines = RENDERERS[output_format](counting(export_rows(queryset, options['chunk_size'])))
+        if path == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        started = time.perf_counter()
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            handle.writelines(lines)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {counted} product(s) to {path} in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,203 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.products.cache import bump_catalog_version, bump_price_version
+from apps.products.facets import rebuild_facet_counts
+from apps.products.models import Category, Product
+from apps.products.serializers.product import ProductImportSerializer
+
+
+def read_csv(handle):
+    for line_number, row in enumerate(csv.DictReader(handle), start=2):
+        yield line_number, row
+
+
+def read_jsonl(handle):
+    for line_number, line in enumerate(handle, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = {'__error__': f'Invalid JSON: {exc}'}
+        if not isinstance(row, dict):
+            row = {'__error__': 'Each line must be a JSON object.'}
+        yield line_number, row
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def clean_row(row):
+    """Drop empty cells so optional columns fall back to model defaults"""
+    return {
+        key.strip(): value
+        for key, value in row.items()
+        if key and value not in ('', None)
+    }
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update products from a CSV or JSONL file, matched on sku. "
+        "The file is streamed and written in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Input format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows validated and written per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Write rejected rows with their errors to this JSONL file'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        path = options['path']
+        input_format = options['format'] or Path(path).suffix.lstrip('.').lower()
+        if input_format not in READERS:
+            raise CommandError("Unknown input format, pass --format csv or --format jsonl.")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        rejects_file = open(options['rejects'], 'w') if options['rejects'] else None
+        handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        started = time.perf_counter()
+        totals = {'created': 0, 'updated': 0, 'rejected': 0}
+
+        try:
+            rows = READERS[input_format](handle)
+            for chunk in chunked(rows, options['chunk_size']):
+                created, updated, rejected = self.import_chunk(chunk)
+                totals['created'] += created
+                totals['updated'] += updated
+                totals['rejected'] += len(rejected)
+                self.report_rejects(rejected, rejects_file)
+                if self.verbosity > 1:
+                    self.stdout.write(f"{sum(totals.values())} row(s) processed")
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+            if rejects_file:
+                rejects_file.close()
+
+        if totals['created'] or totals['updated']:
+            # bulk_create bypasses the model signals
+            rebuild_facet_counts()
+            bump_catalog_version()
+            bump_price_version()
+
+        elapsed = time.perf_counter() - started
+        processed = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {processed} row(s) in {elapsed:.2f}s "
+            f"({processed / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{totals['created']} created, {totals['updated']} updated, "
+            f"{totals['rejected']} rejected."
+        ))
+
+    def import_chunk(self, chunk):
+        """Validate a chunk of (line number, row) pairs and upsert the valid ones"""
+        rows = []
+        rejected = []
+        for line_number, row in chunk:
+            if '__error__' in row:
+                rejected.append((line_number, row, {'non_field_errors': [row.pop('__error__')]}))
+            else:
+                rows.append((line_number, clean_row(row)))
+
+        context = {'categories': self.load_categories(row for _, row in rows)}
+        valid = {}
+        for line_number, row in rows:
+            serializer = ProductImportSerializer(data=row, context=context)
+            if serializer.is_valid():
+                # A repeated sku within the chunk: the last row wins
+                valid[serializer.validated_data['sku']] = (line_number, row, serializer.validated_data)
+            else:
+                rejected.append((line_number, row, serializer.errors))
+
+        valid = self.reject_slug_conflicts(valid, rejected)
+        if not valid:
+            return 0, 0, rejected
+
+        # Existing products only get the columns a row supplies; missing or
+        # empty cells keep their current value instead of the model default
+        now = timezone.now()
+        groups = {}
+        for _, _, data in valid.values():
+            groups.setdefault(frozenset(data), []).append(Product(**data, created_at=now, updated_at=now))
+
+        with transaction.atomic():
+            existing = set(
+                Product.objects.filter(sku__in=list(valid)).values_list('sku', flat=True)
+            )
+            for columns, products in groups.items():
+                Product.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=['sku'],
+                    update_fields=sorted(columns - {'sku'}) + ['updated_at']
+                )
+
+        return len(valid) - len(existing), len(existing), rejected
+
+    def load_categories(self, rows):
+        """Categories referenced by a chunk, keyed by both id and slug"""
+        references = {str(row['category']).strip() for row in rows if 'category' in row}
+        ids = [reference for reference in references if reference.isdigit()]
+        categories = {}
+        for category in Category.objects.filter(Q(pk__in=ids) | Q(slug__in=references)):
+            categories[str(category.pk)] = category
+            categories[category.slug] = category
+        return categories
+
+    def reject_slug_conflicts(self, valid, rejected):
+        """Slugs are unique too; a slug owned by another sku would fail the whole chunk"""
+        owners = dict(
+            Product.objects.filter(slug__in=[data['slug'] for _, _, data in valid.values()])
+            .values_list('slug', 'sku')
+        )
+        accepted = {}
+        for sku, (line_number, row, data) in valid.items():
+            owner = owners.setdefault(data['slug'], sku)
+            if owner != sku:
+                rejected.append((line_number, row, {'slug': ['Product with this slug already exists.']}))
+            else:
+                accepted[sku] = (line_number, row, data)
+        return accepted
+
+    def report_rejects(self, rejected, rejects_file):
+        for line_number, row, errors in sorted(rejected, key=lambda reject: reject[0]):
+            if rejects_file:
+                rejects_file.write(json.dumps({'line': line_number, 'row': row, 'errors': errors}) + '\n')
+            elif self.verbosity > 0:
+                self.stderr.write(f"Line {line_number}: {json.dumps(errors)}")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.products.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed facet counts from the active products"
+
+    def handle(self, *args, **options):
+        values = rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed counts for {values} facet value(s)."
+        ))
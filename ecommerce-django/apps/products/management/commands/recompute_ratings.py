@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.products.cache import bump_catalog_version
+from apps.products.facets import rebuild_facet_counts
+from apps.products.models import Product, Review
+
+
+RATING_FIELDS = [
+    'rating_sum',
+    'rating_count',
+    'rating_1_count',
+    'rating_2_count',
+    'rating_3_count',
+    'rating_4_count',
+    'rating_5_count',
+]
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized rating summary columns on Product from approved reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of products written per bulk update (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        summaries = (
+            Review.objects.filter(is_approved=True)
+            .values('product_id')
+            .annotate(
+                rating_sum=Sum('rating'),
+                rating_count=Count('id'),
+                **{
+                    f'rating_{star}_count': Count('id', filter=Q(rating=star))
+                    for star in range(1, 6)
+                }
+            )
+            .order_by()
+        )
+
+        # updated_at moves with the ratings so detail ETags change too
+        now = timezone.now()
+        with transaction.atomic():
+            Product.objects.filter(Q(rating_count__gt=0) | Q(rating_sum__gt=0)).update(
+                updated_at=now,
+                **{field: 0 for field in RATING_FIELDS}
+            )
+
+            batch = []
+            updated = 0
+            for summary in summaries.iterator():
+                product = Product(pk=summary['product_id'], updated_at=now)
+                for field in RATING_FIELDS:
+                    setattr(product, field, summary[field])
+                batch.append(product)
+
+                if len(batch) >= batch_size:
+                    Product.objects.bulk_update(batch, RATING_FIELDS + ['updated_at'])
+                    updated += len(batch)
+                    batch = []
+
+            if batch:
+                Product.objects.bulk_update(batch, RATING_FIELDS + ['updated_at'])
+                updated += len(batch)
+
+            # bulk_update skips the signals that maintain the rating buckets
+            rebuild_facet_counts()
+        bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed ratings for {updated} reviewed product(s)."
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:55
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+
+    paths = {}
+    level = list(Category.objects.filter(parent__isnull=True).values_list('id', flat=True))
+    for category_id in level:
+        paths[category_id] = f'/{category_id}/'
+
+    while level:
+        children = Category.objects.filter(parent_id__in=level).values_list('id', 'parent_id')
+        level = []
+        for category_id, parent_id in children:
+            paths[category_id] = f'{paths[parent_id]}{category_id}/'
+            level.append(category_id)
+
+    for category_id, path in paths.items():
+        Category.objects.filter(pk=category_id).update(path=path)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_catalog_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_category_path'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='updatedAt',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:12
+
+from django.db import migrations
+
+from apps.products.search import drop_search_index, ensure_search_index
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only, other backends use the icontains fallback
+    ensure_search_index(schema_editor.connection)
+
+
+def remove_search_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_review_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, remove_search_index),
+    ]
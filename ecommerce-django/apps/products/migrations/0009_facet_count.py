@@ -0,0 +1,79 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:05
+
+from collections import Counter
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# Frozen copy of the buckets at the time of this migration; later changes
+# to apps.products.facets must not alter what this backfill does
+PRICE_BUCKETS = [
+    ('0-25', Decimal('0'), Decimal('25')),
+    ('25-50', Decimal('25'), Decimal('50')),
+    ('50-100', Decimal('50'), Decimal('100')),
+    ('100-250', Decimal('100'), Decimal('250')),
+    ('250-500', Decimal('250'), Decimal('500')),
+    ('500+', Decimal('500'), None),
+]
+
+
+def facet_values(product):
+    price = product['price']
+    if product['discount_price'] is not None and product['discount_price'] < price:
+        price = product['discount_price']
+    values = {
+        'brand': product['brand'] or None,
+        'category': str(product['category_id']),
+        'stock_status': product['stock_status'],
+        'price': next(
+            (label for label, low, high in PRICE_BUCKETS if price >= low and (high is None or price < high)),
+            None
+        ),
+        'rating': None,
+    }
+    if product['rating_count']:
+        values['rating'] = str(min(product['rating_sum'] // product['rating_count'], 5))
+    return {facet: value for facet, value in values.items() if value is not None}
+
+
+def populate_facet_counts(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    FacetCount = apps.get_model('products', 'FacetCount')
+
+    counts = Counter()
+    products = Product.objects.filter(is_active=True).values(
+        'brand', 'category_id', 'stock_status', 'price', 'discount_price', 'rating_sum', 'rating_count'
+    )
+    for product in products.iterator():
+        for facet, value in facet_values(product).items():
+            counts[(facet, value)] += 1
+
+    FacetCount.objects.bulk_create(
+        [FacetCount(facet=facet, value=value, count=count) for (facet, value), count in counts.items()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['facet', 'value'],
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_facet_counts, migrations.RunPython.noop),
+    ]
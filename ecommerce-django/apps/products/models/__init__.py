@@ -2,5 +2,7 @@ from .category import Category
 from .product import Product
 from .product_image import ProductImage
 from .review import Review
+from .facet_count import FacetCount
+from .product_search_index import ProductSearchIndex
 
-__all__ = ['Category', 'Product', 'ProductImage', 'Review']
\ No newline at end of file
+__all__ = ['Category', 'Product', 'ProductImage', 'Review', 'FacetCount', 'ProductSearchIndex']
\ No newline at end of file
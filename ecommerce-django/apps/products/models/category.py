@@ -1,5 +1,6 @@
 
 from django.db import models
+from django.db.models.functions import Concat, Substr
 
 
 class Category(models.Model):
@@ -8,6 +9,8 @@ class Category(models.Model):
     slug= models.SlugField(max_length=100, unique=True)
     description= models.TextField(blank=True)
     image= models.ImageField(upload_to='categories/', blank=True, null=True)
+    # Resized/WebP renditions written by apps.products.images
+    variants= models.JSONField(default=dict, blank=True, editable=False)
 
     parent= models.ForeignKey(
         'self',
@@ -16,13 +19,49 @@ class Category(models.Model):
         null=True,
         related_name='children'
     )
+    # Materialized path of ancestor ids, e.g. "/1/4/9/"
+    path= models.CharField(max_length=255, blank=True, editable=False, db_index=True)
 
     is_active= models.BooleanField(default=True)
     createdAt= models.DateTimeField(auto_now_add=True)
-    updatedAt= models.DateTimeField(auto_now_add=True)
+    updatedAt= models.DateTimeField(auto_now=True)
      
     class Meta:
         ordering=['name']
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+    @staticmethod
+    def _path_range(path):
+        """Bounds matching every path that starts with `path`"""
+        return {'path__gte': path, 'path__lt': path[:-1] + chr(ord('/') + 1)}
+
+    def get_descendants(self, include_self=True):
+        """Subtree of this category resolved with one indexed range predicate"""
+        queryset = Category.objects.filter(**self._path_range(self.path))
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
+    def save(self, *args, **kwargs):
+        parent_path = '/'
+        if self.parent_id:
+            parent_path = Category.objects.values_list('path', flat=True).get(pk=self.parent_id)
+            if self.path and parent_path.startswith(self.path):
+                raise ValueError("A category cannot be moved under its own subtree.")
+
+        old_path = self.path
+        super().save(*args, **kwargs)
+
+        new_path = f'{parent_path}{self.pk}/'
+        if new_path == old_path:
+            return
+
+        Category.objects.filter(pk=self.pk).update(path=new_path)
+        self.path = new_path
+        if old_path:
+            # Rewrite the prefix of every descendant in a single statement
+            Category.objects.filter(**self._path_range(old_path)).exclude(pk=self.pk).update(
+                path=Concat(models.Value(new_path), Substr('path', len(old_path) + 1))
+            )
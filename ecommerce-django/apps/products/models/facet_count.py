@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class FacetCount(models.Model):
+    """
+    Precomputed number of active products per facet value (brand, category,
+    stock status, price bucket, rating bucket), kept up to date by product
+    and review signals.
+    """
+
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['facet', 'value']
+        unique_together = ['facet', 'value']
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
@@ -33,18 +33,64 @@ class Product(models.Model):
     
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
+
+    # Denormalized summary of approved reviews, maintained by review signals
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', 'id']
+        indexes = [
+            # Catalog listing and cursor pagination
+            models.Index(
+                fields=['-created_at', 'id'],
+                name='product_active_created_idx',
+                condition=models.Q(is_active=True)
+            ),
+            # Featured listing
+            models.Index(
+                fields=['-created_at', 'id'],
+                name='product_featured_created_idx',
+                condition=models.Q(is_active=True, is_featured=True)
+            ),
+            # Per-category listing
+            models.Index(
+                fields=['category', '-created_at', 'id'],
+                name='product_category_created_idx',
+                condition=models.Q(is_active=True)
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
 
+    @property
+    def average_rating(self):
+        if self.rating_count:
+            return round(self.rating_sum / self.rating_count, 1)
+        return None
+
+    @property
+    def rating_histogram(self):
+        return {
+            str(star): getattr(self, f'rating_{star}_count')
+            for star in range(1, 6)
+        }
+
+    @property
+    def is_on_sale(self):
+        return self.discount_price is not None and self.discount_price < self.price
+
     @property
     def current_price(self):
         return self.discount_price if self.is_on_sale else self.price
\ No newline at end of file
@@ -8,10 +8,15 @@ class ProductImage(models.Model):
     alt_text = models.CharField(max_length=255, blank=True)
     is_primary = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
+    # Resized/WebP renditions written by apps.products.images
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['product', 'is_primary'], name='product_image_primary_idx'),
+        ]
 
     def __str__(self):
         return f"Image for {self.product.name}"
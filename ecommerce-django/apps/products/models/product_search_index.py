@@ -0,0 +1,23 @@
+from django.db import models
+
+from .product import Product
+
+
+class ProductSearchIndex(models.Model):
+    """
+    The FTS5 table created by apps.products.search, mapped read-only so the
+    ORM can join it to products by rowid. Not managed by migrations.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search_index'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'products_product_fts'
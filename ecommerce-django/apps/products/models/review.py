@@ -24,6 +24,20 @@ class Review(models.Model):
     class Meta:
         ordering= ['-created_at']
         unique_together=['product', 'user']
+        indexes= [
+            models.Index(fields=['product', 'is_approved'], name='review_product_approved_idx'),
+            # Paginated review listing by recency and by rating
+            models.Index(
+                fields=['product', '-created_at'],
+                name='review_recent_idx',
+                condition=models.Q(is_approved=True)
+            ),
+            models.Index(
+                fields=['product', '-rating', '-created_at', '-id'],
+                name='review_rating_idx',
+                condition=models.Q(is_approved=True)
+            ),
+        ]
 
 
 
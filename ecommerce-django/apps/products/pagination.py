@@ -0,0 +1,157 @@
+import json
+from base64 import b64decode, b64encode
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the product catalog.
+    Pages are addressed by an opaque cursor over (-created_at, id), so
+    deep pages cost the same as the first one and stay stable while
+    new products are inserted.
+    """
+
+    ordering = ('-created_at', 'id')
+    page_size = getattr(settings, 'PRODUCT_PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'PRODUCT_MAX_PAGE_SIZE', 100)
+
+
+class ReviewCursorPagination(BasePagination):
+    """
+    Keyset pagination for product reviews.
+    DRF's CursorPagination positions on the first ordering field only and
+    falls back to offsets within ties, which a 1-5 rating is full of. Here
+    the cursor holds every column of a unique ordering and the next page
+    starts with a row-value comparison against it.
+
+    ?ordering=-created_at (default) or ?ordering=-rating.
+    """
+
+    orderings = {
+        '-created_at': ('-created_at', '-id'),
+        '-rating': ('-rating', '-created_at', '-id'),
+    }
+    default_ordering = '-created_at'
+    ordering_param = 'ordering'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_size = getattr(settings, 'REVIEW_PAGE_SIZE', 10)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'REVIEW_MAX_PAGE_SIZE', 50)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering_name = request.query_params.get(self.ordering_param)
+        if self.ordering_name not in self.orderings:
+            self.ordering_name = self.default_ordering
+        self.ordering = self.orderings[self.ordering_name]
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+        ordering = [self._flip(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _after(ordering, position):
+        """(a, b, c) past the cursor: a beyond, or a equal and b beyond, ..."""
+        conditions = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {ordering[i].lstrip('-'): position[i] for i in range(index)}
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': position[index]}))
+        return reduce(or_, conditions)
+
+    def _position(self, instance):
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            'o': self.ordering_name,
+            'p': [value.isoformat() if hasattr(value, 'isoformat') else value
+                  for value in self._position(instance)],
+            'r': int(reverse),
+        }
+        cursor = b64encode(json.dumps(payload).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """(position, reverse) of the cursor param, (None, False) on the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode(), validate=True))
+            if payload['o'] != self.ordering_name or len(payload['p']) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, payload['p'])
+            ]
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload['r'])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class ProductSearchPagination(PageNumberPagination):
+    """
+    Page number pagination for ranked search results.
+    Relevance is not a stable column, so ?q= results are paged by position.
+    """
+
+    page_size = getattr(settings, 'PRODUCT_PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'PRODUCT_MAX_PAGE_SIZE', 100)
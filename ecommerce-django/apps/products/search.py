@@ -0,0 +1,139 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'products_product_fts'
+FTS_COLUMNS = ['name', 'short_description', 'description', 'brand', 'sku']
+# bm25 column weights, in FTS_COLUMNS order
+FTS_WEIGHTS = [10.0, 4.0, 1.0, 3.0, 8.0]
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+_COLUMNS = ', '.join(FTS_COLUMNS)
+_NEW_VALUES = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+_OLD_VALUES = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+
+# External-content FTS5 table kept in sync with products_product by triggers
+SEARCH_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_COLUMNS},
+        content='products_product',
+        content_rowid='id',
+        tokenize='unicode61',
+        prefix='2 3'
+    )
+"""
+SEARCH_TRIGGERS_SQL = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON products_product BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+        END
+    """,
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON products_product BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS})
+            VALUES ('delete', old.id, {_OLD_VALUES});
+        END
+    """,
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF {_COLUMNS} ON products_product BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS})
+            VALUES ('delete', old.id, {_OLD_VALUES});
+            INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+        END
+    """,
+}
+
+
+def fts_available(using=None):
+    return (using or connection).vendor == 'sqlite'
+
+
+def ensure_search_index(using=None, create=True):
+    """
+    Create the FTS5 table and its triggers if missing and rebuild the index
+    when anything had to be created. SQLite drops triggers whenever a
+    migration remakes products_product, so this also runs after migrate
+    (with create=False, repairing only an index that already exists).
+    """
+    using = using or connection
+    if not fts_available(using):
+        return False
+
+    with using.cursor() as cursor:
+        if not create and FTS_TABLE not in using.introspection.table_names(cursor):
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'products_product'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in SEARCH_TRIGGERS_SQL if name not in existing]
+        if not missing:
+            return False
+
+        cursor.execute(SEARCH_TABLE_SQL)
+        for name in missing:
+            cursor.execute(SEARCH_TRIGGERS_SQL[name])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def drop_search_index(using=None):
+    using = using or connection
+    if not fts_available(using):
+        return
+
+    with using.cursor() as cursor:
+        for name in SEARCH_TRIGGERS_SQL:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def build_match_expression(query):
+    """
+    Turn free text into an FTS5 MATCH expression.
+    Every term must match and the last one is matched as a prefix, so
+    "wireless head" finds "Wireless Headphones".
+    """
+    terms = TERM_RE.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_products(queryset, query):
+    """Filter `queryset` to products matching `query`, best matches first"""
+    if fts_available(connections[queryset.db]):
+        match = build_match_expression(query)
+        if match is None:
+            return queryset.none()
+
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        # search_index joins the FTS table on rowid; MATCH and bm25() have to
+        # run in the query that joins it
+        return queryset.filter(
+            search_index__isnull=False
+        ).filter(
+            RawSQL(f'{FTS_TABLE} MATCH %s', [match], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'bm25({FTS_TABLE}, {weights})', [], output_field=FloatField())
+        ).order_by('search_rank', 'id')
+
+    # Other backends fall back to substring scans
+    return icontains_search(queryset, query)
+
+
+def icontains_search(queryset, query):
+    """Substring scan over the indexed columns, every term must match"""
+    condition = Q()
+    for term in TERM_RE.findall(query):
+        term_condition = Q()
+        for column in FTS_COLUMNS:
+            term_condition |= Q(**{f'{column}__icontains': term})
+        condition &= term_condition
+    return queryset.filter(condition)
@@ -1,6 +1,6 @@
 from .category import CategorySerializer, CategoryListSerializer
 from .product import ProductListSerializer, ProductDetailSerializer, ProductCreateSerializer, ProductCreateUpdateSerializer
-from .product_image import ProductImageSerializer, ProductImageCreateSerializer
+from .product_image import ProductImageSerializer, ProductImageCreateSerializer, ProductImageBatchSerializer
 from .review import ReviewSerializer, ReviewCreateSerializer
 
 __all__ = [
@@ -12,6 +12,7 @@ __all__ = [
     'ProductImageCreateSerializer',
     'ProductCreateSerializer',
     'ProductImageSerializer',
+    'ProductImageBatchSerializer',
     'ReviewSerializer',
     'ReviewCreateSerializer'    
 ]
\ No newline at end of file
@@ -1,9 +1,13 @@
 from rest_framework import serializers
+from apps.products.images import build_srcset
 from apps.products.models import Category
 
 
 class CategorySerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    created_at = serializers.DateTimeField(source='createdAt', read_only=True)
+    updated_at = serializers.DateTimeField(source='updatedAt', read_only=True)
     
     class Meta:
         model = Category
@@ -13,21 +17,34 @@ class CategorySerializer(serializers.ModelSerializer):
             'slug', 
             'description', 
             'image', 
+            'srcset',
             'parent', 
             'children',
             'is_active',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'name' 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_children(self, obj):
-        children = obj.children.filter(is_active=True)
-        return CategorySerializer(children, many=True).data
+        # Use the parent -> children map built by the tree view when available
+        if 'children' in self.context:
+            children = self.context['children'].get(obj.id, [])
+        else:
+            children = obj.children.filter(is_active=True)
+        return CategorySerializer(children, many=True, context=self.context).data
+
+    def get_srcset(self, obj):
+        return build_srcset(obj, self.context.get('request'))
 
 
 class CategoryListSerializer(serializers.ModelSerializer):
+
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'image']
\ No newline at end of file
+        fields = ['id', 'name', 'slug', 'image', 'srcset']
+
+    def get_srcset(self, obj):
+        return build_srcset(obj, self.context.get('request'))
@@ -1,16 +1,45 @@
 from rest_framework import serializers
-from django.db.models import Avg
+from django.conf import settings
+from django.db.models import Prefetch
 from apps.products.models import Product, ProductImage, Category, Review
-from .product_image import ProductImageSerializer, ProductImageCreateSerializer
+from apps.products.images import schedule_derivatives
+from .product_image import ProductImageSerializer, ProductImageCreateSerializer, MAX_PRODUCT_IMAGES, normalize_images
 from .category import CategoryListSerializer
 from .review import ReviewSerializer
 
 
+def primary_image_prefetch(lookup='images'):
+    """Prefetch consumed by ProductListSerializer.get_primary_image"""
+    return Prefetch(
+        lookup,
+        queryset=ProductImage.objects.filter(is_primary=True),
+        to_attr='primary_images'
+    )
+
+
+PRODUCT_DETAIL_REVIEW_LIMIT = getattr(settings, 'PRODUCT_DETAIL_REVIEW_LIMIT', 5)
+
+
+def latest_reviews_queryset():
+    return Review.objects.filter(is_approved=True).select_related('user').order_by('-created_at', '-id')
+
+
+def latest_reviews_prefetch():
+    """Prefetch consumed by ProductDetailSerializer.get_reviews"""
+    return Prefetch(
+        'reviews',
+        queryset=latest_reviews_queryset()[:PRODUCT_DETAIL_REVIEW_LIMIT],
+        to_attr='latest_reviews'
+    )
+
+
 class ProductListSerializer(serializers.ModelSerializer):
     
     category_name = serializers.CharField(source='category.name', read_only=True)
     primary_image = serializers.SerializerMethodField()
     current_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+    review_count = serializers.IntegerField(source='rating_count', read_only=True)
     
     class Meta:
         model = Product
@@ -23,12 +52,18 @@ class ProductListSerializer(serializers.ModelSerializer):
             'current_price',
             'category_name',
             'primary_image',
+            'average_rating',
+            'review_count',
             'stock_status',
             'is_active'
         ]
     
     def get_primary_image(self, obj):
-        primary = obj.images.filter(is_primary=True).first()
+        # Use the list loaded by primary_image_prefetch when available
+        if hasattr(obj, 'primary_images'):
+            primary = obj.primary_images[0] if obj.primary_images else None
+        else:
+            primary = obj.images.filter(is_primary=True).first()
         if primary:
             return ProductImageSerializer(primary).data
         return None
@@ -38,10 +73,11 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     
     category = CategoryListSerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
-    reviews = ReviewSerializer(many=True, read_only=True)
+    reviews = serializers.SerializerMethodField()
     current_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    average_rating = serializers.SerializerMethodField()
-    review_count = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(read_only=True)
+    review_count = serializers.IntegerField(source='rating_count', read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
     
     class Meta:
         model = Product
@@ -67,19 +103,19 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'reviews',
             'average_rating',
             'review_count',
+            'rating_histogram',
             'created_at',
             'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
-    
-    def get_average_rating(self, obj):
-        reviews = obj.reviews.filter(is_approved=True)
-        if reviews.exists():
-            return round(reviews.aggregate(Avg('rating'))['rating__avg'], 1)
-        return None
-    
-    def get_review_count(self, obj):
-        return obj.reviews.filter(is_approved=True).count()
+
+    def get_reviews(self, obj):
+        """Latest approved reviews, the full list is paginated at /products/{slug}/reviews/"""
+        if hasattr(obj, 'latest_reviews'):
+            reviews = obj.latest_reviews
+        else:
+            reviews = latest_reviews_queryset().filter(product=obj)[:PRODUCT_DETAIL_REVIEW_LIMIT]
+        return ReviewSerializer(reviews, many=True, context=self.context).data
 
 
 class ProductCreateSerializer(serializers.ModelSerializer):
@@ -125,8 +161,8 @@ class ProductCreateSerializer(serializers.ModelSerializer):
     
     def validate_images(self, value):
         """Validate images list"""
-        if value and len(value) > 10:
-            raise serializers.ValidationError("Maximum 10 images allowed.")
+        if value and len(value) > MAX_PRODUCT_IMAGES:
+            raise serializers.ValidationError(f"Maximum {MAX_PRODUCT_IMAGES} images allowed.")
         return value
     
     def validate(self, attrs):
@@ -146,27 +182,55 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         Custom create method to handle nested images.
         This is REQUIRED for writable nested serializers.
         """
-        # Extract images from validated data
-        images_data = validated_data.pop('images', [])
-        
-        # Create the product
+        images_data = normalize_images(validated_data.pop('images', []))
+
         product = Product.objects.create(**validated_data)
-        
-        # Create images linked to product
-        for index, image_data in enumerate(images_data):
-            # Set order if not provided
-            if 'order' not in image_data or image_data.get('order') is None:
-                image_data['order'] = index
-            
-            # Set first image as primary if none specified
-            if index == 0 and not any(img.get('is_primary', False) for img in images_data):
-                image_data['is_primary'] = True
-            
-            ProductImage.objects.create(product=product, **image_data)
-        
+        images = ProductImage.objects.bulk_create([
+            ProductImage(product=product, **image_data)
+            for image_data in images_data
+        ])
+        schedule_derivatives(images)
+
         return product
 
 
+class PreloadedCategoryField(serializers.RelatedField):
+    """
+    Category given by id or slug, resolved from context['categories'] which
+    the caller loads once per batch instead of one query per row.
+    """
+
+    default_error_messages = {
+        'does_not_exist': 'Category "{value}" does not exist.',
+    }
+
+    def to_internal_value(self, data):
+        category = self.context.get('categories', {}).get(str(data).strip())
+        if category is None:
+            self.fail('does_not_exist', value=data)
+        return category
+
+    def to_representation(self, value):
+        return value.pk
+
+
+class ProductImportSerializer(ProductCreateSerializer):
+    """
+    Row validation for bulk imports. Applies the same rules as product
+    creation; sku and slug uniqueness are handled by the upsert itself.
+    """
+
+    images = None
+    category = PreloadedCategoryField(queryset=Category.objects.all())
+
+    class Meta(ProductCreateSerializer.Meta):
+        fields = [field for field in ProductCreateSerializer.Meta.fields if field != 'images']
+        extra_kwargs = {
+            'sku': {'validators': []},
+            'slug': {'validators': []},
+        }
+
+
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating products"""
     
@@ -1,8 +1,33 @@
 from rest_framework import serializers
-from apps.products.models import ProductImage
+from django.db import transaction
+from django.utils import timezone
+from apps.products.cache import invalidate_product_detail
+from apps.products.images import build_srcset, schedule_derivatives
+from apps.products.models import Product, ProductImage
+
+
+MAX_PRODUCT_IMAGES = 10
+
+
+def normalize_images(images_data):
+    """
+    Fill in missing order values from list position and keep exactly one
+    primary image: the first one flagged, or the first image otherwise.
+    """
+    primary_index = next(
+        (index for index, image_data in enumerate(images_data) if image_data.get('is_primary')),
+        0
+    )
+    for index, image_data in enumerate(images_data):
+        if image_data.get('order') is None:
+            image_data['order'] = index
+        image_data['is_primary'] = index == primary_index
+    return images_data
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductImage
@@ -10,6 +35,7 @@ class ProductImageSerializer(serializers.ModelSerializer):
             'id',
             'product',
             'image',
+            'srcset',
             'alt_text',
             'is_primary',
             'order',
@@ -17,6 +43,10 @@ class ProductImageSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
+    def get_srcset(self, obj):
+        """Resized variants per format, empty until they are generated"""
+        return build_srcset(obj, self.context.get('request'))
+
     
 class ProductImageCreateSerializer(serializers.ModelSerializer):
 
@@ -28,3 +58,94 @@ class ProductImageCreateSerializer(serializers.ModelSerializer):
             'is_primary',
             'order'
         ]
+
+
+
+class ProductImageBatchItemSerializer(serializers.ModelSerializer):
+    """An existing image by id, or a new upload without one"""
+
+    id = serializers.IntegerField(required=False)
+    image = serializers.ImageField(required=False)
+    order = serializers.IntegerField(required=False, min_value=0)
+
+    class Meta:
+        model = ProductImage
+        fields = [
+            'id',
+            'image',
+            'alt_text',
+            'is_primary',
+            'order'
+        ]
+
+    def validate(self, attrs):
+        if 'id' not in attrs and 'image' not in attrs:
+            raise serializers.ValidationError({'image': 'New images require a file.'})
+        return attrs
+
+
+class ProductImageBatchSerializer(serializers.Serializer):
+    """
+    Replace a product's image set in one request. Listed ids are kept in the
+    given order, unlisted images are deleted and entries without an id are
+    uploaded. Each kind of change is written with a single bulk statement.
+    """
+
+    images = ProductImageBatchItemSerializer(many=True, max_length=MAX_PRODUCT_IMAGES)
+
+    def validate_images(self, value):
+        product = self.context['product']
+        current = {image.pk for image in product.images.all()}
+
+        errors = {}
+        seen = set()
+        for index, image_data in enumerate(value):
+            image_id = image_data.get('id')
+            if image_id is None:
+                continue
+            if image_id not in current:
+                errors[str(index)] = {'id': 'Image does not belong to this product.'}
+            elif image_id in seen:
+                errors[str(index)] = {'id': 'Image is listed more than once.'}
+            seen.add(image_id)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return normalize_images(value)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Apply the new image set; returns the product's images in display order"""
+        product = self.context['product']
+        existing = {image.pk: image for image in product.images.all()}
+
+        kept = []
+        created = []
+        for image_data in validated_data['images']:
+            fields = {field: value for field, value in image_data.items() if field != 'id'}
+            if image_data.get('id') is None:
+                created.append(ProductImage(product=product, **fields))
+                continue
+            image = existing[image_data['id']]
+            upload = fields.pop('image', None)
+            for field, value in fields.items():
+                setattr(image, field, value)
+            if upload is not None:
+                # bulk_update does not run FileField.pre_save, store the file here
+                image.image.save(upload.name, upload, save=False)
+            kept.append(image)
+
+        removed = set(existing) - {image.pk for image in kept}
+        if removed:
+            ProductImage.objects.filter(pk__in=removed).delete()
+        if kept:
+            ProductImage.objects.bulk_update(kept, ['image', 'alt_text', 'is_primary', 'order'])
+        if created:
+            ProductImage.objects.bulk_create(created)
+        # bulk writes skip the post_save hook that queues derivatives
+        schedule_derivatives(kept + created)
+
+        # Bulk writes skip the image signals that move the product validators
+        Product.objects.filter(pk=product.pk).update(updated_at=timezone.now())
+        invalidate_product_detail(product.slug)
+
+        return sorted(kept + created, key=lambda image: (image.order, image.pk or 0))
@@ -4,6 +4,7 @@ from apps.products.models import Review
 
 class ReviewSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
+    is_verified_purchase = serializers.BooleanField(source='is_verfied_purchase', read_only=True)
     
     class Meta:
         model = Review
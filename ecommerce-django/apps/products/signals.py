@@ -0,0 +1,172 @@
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, post_migrate
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.products.cache import (
+    bump_catalog_version,
+    bump_price_version,
+    invalidate_category_tree,
+    invalidate_product_detail
+)
+from apps.products.facets import STATE_FIELDS, apply_state_change, product_state
+from apps.products.images import discard_derivatives, schedule_derivatives
+from apps.products.models import Category, Product, ProductImage, Review
+from apps.products.search import ensure_search_index
+
+
+def _collect(deltas, product_id, rating, sign):
+    """Accumulate the column changes for one review contribution"""
+    columns = deltas[product_id]
+    columns['rating_sum'] += sign * rating
+    columns['rating_count'] += sign
+    columns[f'rating_{rating}_count'] += sign
+
+
+def _apply(deltas):
+    """Apply accumulated deltas with one UPDATE per product"""
+    for product_id, columns in deltas.items():
+        changes = {
+            column: F(column) + delta
+            for column, delta in columns.items()
+            if delta
+        }
+        if not changes:
+            continue
+
+        old_state = Product.objects.filter(pk=product_id).values(*STATE_FIELDS).first()
+        Product.objects.filter(pk=product_id).update(**changes)
+        if old_state:
+            # The rating bucket facet follows the new average
+            new_state = dict(old_state)
+            new_state['rating_sum'] += columns['rating_sum']
+            new_state['rating_count'] += columns['rating_count']
+            apply_state_change(old_state, new_state)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, raw=False, **kwargs):
+    """Keep the stored state so post_save can undo its contribution"""
+    instance._previous_rating = None
+    if instance.pk and not raw:
+        instance._previous_rating = (
+            Review.objects.filter(pk=instance.pk)
+            .values('product_id', 'rating', 'is_approved')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_ratings_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    previous = getattr(instance, '_previous_rating', None)
+    if previous and previous['is_approved']:
+        _collect(deltas, previous['product_id'], previous['rating'], -1)
+    if instance.is_approved:
+        _collect(deltas, instance.product_id, instance.rating, 1)
+
+    _apply(deltas)
+    instance._previous_rating = None
+
+
+@receiver(post_delete, sender=Review)
+def update_ratings_on_delete(sender, instance, **kwargs):
+    if instance.is_approved:
+        deltas = defaultdict(lambda: defaultdict(int))
+        _collect(deltas, instance.product_id, instance.rating, -1)
+        _apply(deltas)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree_cache(sender, **kwargs):
+    invalidate_category_tree()
+    # Category data is embedded in every product detail
+    bump_catalog_version()
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_facets(sender, instance, raw=False, **kwargs):
+    instance._previous_facets = None
+    if instance.pk and not raw:
+        instance._previous_facets = (
+            Product.objects.filter(pk=instance.pk).values(*STATE_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def update_facets_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_facets', None)
+    apply_state_change(previous, product_state(instance))
+    instance._previous_facets = None
+    if previous and (previous['price'], previous['discount_price']) != (instance.price, instance.discount_price):
+        # Cached cart totals were computed with the old price
+        bump_price_version()
+
+
+@receiver(pre_delete, sender=Product)
+def update_facets_on_delete(sender, instance, **kwargs):
+    """
+    Drop the product from the facet counts before its reviews are cascaded.
+    The row is marked inactive so the review signals that follow leave the
+    rating buckets alone.
+    """
+    state = Product.objects.filter(pk=instance.pk).values(*STATE_FIELDS).first()
+    if state and state['is_active']:
+        apply_state_change(state, None)
+        Product.objects.filter(pk=instance.pk).update(is_active=False)
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_cart_totals_on_delete(sender, **kwargs):
+    # Cart lines of the product were cascaded away
+    bump_price_version()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_details(sender, raw=False, **kwargs):
+    # Covers slug changes and deactivation without tracking old slugs
+    if not raw:
+        bump_catalog_version()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_related_product_detail(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Images and reviews are part of the product payload, so they move its validators
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+    slug = Product.objects.filter(pk=instance.product_id).values_list('slug', flat=True).first()
+    if slug:
+        invalidate_product_detail(slug)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+def queue_image_derivatives(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_derivatives([instance])
+
+
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_delete, sender=Category)
+def remove_image_derivatives(sender, instance, **kwargs):
+    discard_derivatives(instance)
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using='default', **kwargs):
+    if sender.name == 'apps.products':
+        ensure_search_index(connections[using], create=False)
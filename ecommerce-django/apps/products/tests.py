@@ -1,3 +1,1148 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+import json
+import os
+import re
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.products.facets import rebuild_facet_counts, stored_facet_counts
+from apps.products.images import generate_derivatives
+from apps.products.models import Category, Product, ProductImage, Review
+from apps.products.search import drop_search_index, ensure_search_index
+
+User = get_user_model()
+
+
+class ProductTestMixin:
+    """Helpers for building catalog fixtures"""
+
+    def create_category(self, name='Electronics', **kwargs):
+        return Category.objects.create(name=name, slug=name.lower(), **kwargs)
+
+    def create_product(self, category, index, **kwargs):
+        defaults = {
+            'name': f'Product {index}',
+            'slug': f'product-{index}',
+            'sku': f'SKU-{index}',
+            'description': 'Description',
+            'price': Decimal('100.00'),
+            'quantity': 10,
+            'category': category,
+        }
+        defaults.update(kwargs)
+        return Product.objects.create(**defaults)
+
+    def create_image(self, product, is_primary=False, order=0):
+        return ProductImage.objects.create(
+            product=product,
+            image=f'products/{product.slug}-{order}.jpg',
+            is_primary=is_primary,
+            order=order
+        )
+
+    def create_review(self, product, index, rating, is_approved=True):
+        user = User.objects.create(username=f'reviewer-{index}')
+        return Review.objects.create(
+            product=product,
+            user=user,
+            rating=rating,
+            title='Review',
+            comment='Comment',
+            is_approved=is_approved
+        )
+
+
+class ProductListQueryTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = self.create_category()
+
+    def populate(self, count, start=0):
+        for index in range(start, start + count):
+            product = self.create_product(self.category, index, is_featured=True)
+            self.create_image(product, is_primary=True, order=0)
+            self.create_image(product, order=1)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context), response
+
+    def test_list_query_count_is_constant(self):
+        self.populate(30)
+        small, _ = self.count_queries('/api/v1/products/?page_size=2')
+        large, response = self.count_queries('/api/v1/products/?page_size=25')
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 2)
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_featured_query_count_is_constant(self):
+        self.populate(2)
+        small, _ = self.count_queries('/api/v1/products/featured/')
+
+        self.populate(20, start=2)
+        large, _ = self.count_queries('/api/v1/products/featured/')
+
+        self.assertEqual(small, large)
+
+    def test_list_uses_prefetched_primary_image(self):
+        self.populate(1)
+        _, response = self.count_queries('/api/v1/products/')
+
+        item = response.data['results'][0]
+        self.assertEqual(item['category_name'], 'Electronics')
+        self.assertTrue(item['primary_image']['is_primary'])
+
+    def test_product_without_primary_image(self):
+        self.create_product(self.category, 0)
+        _, response = self.count_queries('/api/v1/products/')
+
+        self.assertIsNone(response.data['results'][0]['primary_image'])
+
+
+class ProductPaginationTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = self.create_category()
+        for index in range(7):
+            self.create_product(self.category, index)
+
+    def collect(self, url):
+        slugs = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            slugs.extend(item['slug'] for item in response.data['results'])
+            url = response.data['next']
+        return slugs
+
+    def test_pages_cover_catalog_once(self):
+        slugs = self.collect('/api/v1/products/?page_size=3')
+
+        expected = list(
+            Product.objects.order_by('-created_at', 'id').values_list('slug', flat=True)
+        )
+        self.assertEqual(slugs, expected)
+
+    def test_cursor_is_stable_under_inserts(self):
+        response = self.client.get('/api/v1/products/?page_size=3')
+        first_page = [item['slug'] for item in response.data['results']]
+
+        # A product created after the first page must not shift later pages
+        self.create_product(self.category, 99)
+        remaining = self.collect(response.data['next'])
+
+        self.assertEqual(len(first_page) + len(remaining), 7)
+        self.assertFalse(set(first_page) & set(remaining))
+        self.assertNotIn('product-99', remaining)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get('/api/v1/products/?page_size=100000')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(response.data['results']), 100)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite specific')
+class CatalogQueryPlanTests(ProductTestMixin, TestCase):
+    """Fail if hot catalog queries fall back to full table scans"""
+
+    FULL_SCAN = re.compile(r'\bSCAN (\w+)$')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = self.create_category()
+        for index in range(5):
+            product = self.create_product(self.category, index, is_featured=index % 2 == 0)
+            self.create_image(product, is_primary=True)
+            self.create_review(product, index, 4)
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedPlans(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        tables = set(connection.introspection.table_names())
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            plan = self.query_plan(query['sql'])
+            for step in plan:
+                # Scans of subqueries and CTEs are fine, scans of tables are not
+                match = self.FULL_SCAN.search(step)
+                self.assertFalse(
+                    match and match.group(1) in tables,
+                    f"Full table scan in plan {plan} for {query['sql']}"
+                )
+
+    def test_list_plan(self):
+        self.assertIndexedPlans('/api/v1/products/')
+
+    def test_featured_plan(self):
+        self.assertIndexedPlans('/api/v1/products/featured/')
+
+    def test_detail_plan(self):
+        self.assertIndexedPlans('/api/v1/products/product-0/')
+
+    def test_listing_order_uses_index(self):
+        querysets = [
+            Product.objects.filter(is_active=True),
+            Product.objects.filter(is_active=True, is_featured=True),
+            Product.objects.filter(is_active=True, category=self.category),
+        ]
+        for queryset in querysets:
+            plan = queryset.order_by('-created_at', 'id')[:20].explain()
+            self.assertIn('USING INDEX', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ProductDetailQueryTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = self.create_product(self.create_category(), 0)
+        self.create_image(self.product, is_primary=True)
+        self.url = f'/api/v1/products/{self.product.slug}/'
+
+    def test_rating_summary_counts_approved_reviews_only(self):
+        self.create_review(self.product, 0, 5)
+        self.create_review(self.product, 1, 4)
+        self.create_review(self.product, 2, 1, is_approved=False)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['average_rating'], 4.5)
+        self.assertEqual(response.data['review_count'], 2)
+
+    def test_product_without_reviews(self):
+        response = self.client.get(self.url)
+
+        self.assertIsNone(response.data['average_rating'])
+        self.assertEqual(response.data['review_count'], 0)
+
+    def test_detail_query_count_is_constant(self):
+        self.create_review(self.product, 0, 5)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+
+        for index in range(1, 15):
+            self.create_review(self.product, index, 3)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url)
+
+        self.assertEqual(len(small), len(large))
+        self.assertLessEqual(len(large), 4)
+
+
+class ProductRatingSummaryTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        self.product = self.create_product(self.create_category(), 0)
+
+    def assertSummary(self, rating_sum, rating_count, histogram):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_sum, rating_sum)
+        self.assertEqual(self.product.rating_count, rating_count)
+        self.assertEqual(self.product.rating_histogram, histogram)
+
+    def test_create_updates_summary(self):
+        self.create_review(self.product, 0, 5)
+        self.create_review(self.product, 1, 3)
+
+        self.assertSummary(8, 2, {'1': 0, '2': 0, '3': 1, '4': 0, '5': 1})
+        self.assertEqual(self.product.average_rating, 4.0)
+
+    def test_edit_moves_rating_between_buckets(self):
+        review = self.create_review(self.product, 0, 5)
+        review.rating = 2
+        review.save()
+
+        self.assertSummary(2, 1, {'1': 0, '2': 1, '3': 0, '4': 0, '5': 0})
+
+    def test_unapprove_and_approve(self):
+        review = self.create_review(self.product, 0, 4)
+        review.is_approved = False
+        review.save()
+        self.assertSummary(0, 0, {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0})
+
+        review.is_approved = True
+        review.save()
+        self.assertSummary(4, 1, {'1': 0, '2': 0, '3': 0, '4': 1, '5': 0})
+
+    def test_unapproved_review_is_not_counted(self):
+        self.create_review(self.product, 0, 1, is_approved=False)
+
+        self.assertSummary(0, 0, {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0})
+        self.assertIsNone(self.product.average_rating)
+
+    def test_delete_updates_summary(self):
+        review = self.create_review(self.product, 0, 5)
+        self.create_review(self.product, 1, 1)
+        review.delete()
+
+        self.assertSummary(1, 1, {'1': 1, '2': 0, '3': 0, '4': 0, '5': 0})
+
+    def test_recompute_ratings_command(self):
+        self.create_review(self.product, 0, 5)
+        self.create_review(self.product, 1, 2)
+        # Queryset updates bypass signals and leave the summary stale
+        Review.objects.filter(rating=2).update(is_approved=False)
+        Product.objects.filter(pk=self.product.pk).update(rating_sum=99, rating_count=9)
+
+        call_command('recompute_ratings', stdout=StringIO())
+
+        self.assertSummary(5, 1, {'1': 0, '2': 0, '3': 0, '4': 0, '5': 1})
+
+
+class CategoryTreeTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.root = Category.objects.create(name='Electronics', slug='electronics')
+        self.phones = Category.objects.create(name='Phones', slug='phones', parent=self.root)
+        Category.objects.create(name='Android', slug='android', parent=self.phones)
+        Category.objects.create(name='Hidden', slug='hidden', parent=self.root, is_active=False)
+        Category.objects.create(name='Books', slug='books')
+
+    def test_tree_structure(self):
+        response = self.client.get('/api/v1/categories/tree/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([node['slug'] for node in response.data], ['books', 'electronics'])
+        electronics = response.data[1]
+        self.assertEqual([node['slug'] for node in electronics['children']], ['phones'])
+        self.assertEqual(electronics['children'][0]['children'][0]['slug'], 'android')
+
+    def test_tree_is_built_in_one_query_and_cached(self):
+        # One validator aggregate plus one query to load the categories
+        with self.assertNumQueries(2):
+            self.client.get('/api/v1/categories/tree/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/categories/tree/')
+
+    def test_save_and_delete_invalidate_tree(self):
+        self.client.get('/api/v1/categories/tree/')
+
+        Category.objects.create(name='Tablets', slug='tablets', parent=self.root)
+        response = self.client.get('/api/v1/categories/tree/')
+        self.assertIn('tablets', [node['slug'] for node in response.data[1]['children']])
+
+        Category.objects.get(slug='books').delete()
+        response = self.client.get('/api/v1/categories/tree/')
+        self.assertEqual([node['slug'] for node in response.data], ['electronics'])
+
+
+class CategorySubtreeTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.root = self.create_category('Electronics')
+        self.phones = Category.objects.create(name='Phones', slug='phones', parent=self.root)
+        self.android = Category.objects.create(name='Android', slug='android', parent=self.phones)
+        self.books = self.create_category('Books')
+        self.create_product(self.root, 0)
+        self.create_product(self.phones, 1)
+        self.create_product(self.android, 2)
+        self.create_product(self.books, 3)
+
+    def slugs(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['slug'] for item in response.data['results'])
+
+    def test_paths_are_materialized(self):
+        self.assertEqual(self.root.path, f'/{self.root.pk}/')
+        self.assertEqual(self.android.path, f'/{self.root.pk}/{self.phones.pk}/{self.android.pk}/')
+
+    def test_filter_single_category(self):
+        self.assertEqual(self.slugs('/api/v1/products/?category=phones'), ['product-1'])
+
+    def test_filter_with_descendants(self):
+        self.assertEqual(
+            self.slugs('/api/v1/products/?category=electronics&include_descendants=1'),
+            ['product-0', 'product-1', 'product-2']
+        )
+
+    def test_unknown_category_returns_nothing(self):
+        self.assertEqual(self.slugs('/api/v1/products/?category=missing'), [])
+
+    def test_reparenting_rewrites_subtree(self):
+        self.phones.parent = self.books
+        self.phones.save()
+
+        self.android.refresh_from_db()
+        self.assertEqual(self.android.path, f'/{self.books.pk}/{self.phones.pk}/{self.android.pk}/')
+        self.assertEqual(
+            self.slugs('/api/v1/products/?category=books&include_descendants=1'),
+            ['product-1', 'product-2', 'product-3']
+        )
+
+    def test_cannot_move_under_own_subtree(self):
+        self.root.parent = self.android
+        with self.assertRaises(ValueError):
+            self.root.save()
+
+    def test_sibling_prefix_is_not_included(self):
+        # A sibling whose id extends ours ("/1/2/" vs "/1/20/") is outside the range
+        sibling = Category.objects.create(name='Tablets', slug='tablets', parent=self.root)
+        Category.objects.filter(pk=sibling.pk).update(path=self.phones.path[:-1] + '0/')
+
+        descendants = set(self.phones.get_descendants().values_list('slug', flat=True))
+        self.assertEqual(descendants, {'phones', 'android'})
+
+
+class ProductDetailCacheTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = self.create_category()
+        self.product = self.create_product(self.category, 0)
+        self.url = f'/api/v1/products/{self.product.slug}/'
+
+    def test_second_request_is_served_from_cache(self):
+        self.client.get(self.url)
+
+        # Only the validator lookup hits the database
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['slug'], self.product.slug)
+
+    def test_review_invalidates_detail(self):
+        self.client.get(self.url)
+        self.create_review(self.product, 0, 4)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['review_count'], 1)
+
+    def test_image_invalidates_detail(self):
+        self.client.get(self.url)
+        self.create_image(self.product, is_primary=True)
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['images']), 1)
+
+    def test_product_and_category_changes_invalidate_detail(self):
+        self.client.get(self.url)
+        self.product.name = 'Renamed'
+        self.product.save()
+        self.assertEqual(self.client.get(self.url).data['name'], 'Renamed')
+
+        self.category.name = 'Gadgets'
+        self.category.save()
+        self.assertEqual(self.client.get(self.url).data['category']['name'], 'Gadgets')
+
+    @override_settings(ALLOWED_HOSTS=['internal', 'shop.example.com'])
+    def test_cached_detail_is_per_host(self):
+        self.create_image(self.product, is_primary=True)
+        self.client.get(self.url, HTTP_HOST='internal:8000')
+
+        response = self.client.get(self.url, HTTP_HOST='shop.example.com')
+        self.assertTrue(response.data['images'][0]['image'].startswith('http://shop.example.com/'))
+
+    def test_recompute_ratings_invalidates_detail(self):
+        self.create_review(self.product, 0, 4)
+        response = self.client.get(self.url)
+        Product.objects.filter(pk=self.product.pk).update(rating_sum=0, rating_count=0)
+
+        call_command('recompute_ratings', stdout=StringIO())
+
+        cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.data['review_count'], 1)
+
+    def test_deactivated_product_is_not_served(self):
+        self.client.get(self.url)
+        self.client.delete(self.url)
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_cache_stats(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        admin = User.objects.create(username='admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        response = self.client.get('/api/v1/products/cache-stats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_cache_stats_requires_staff(self):
+        response = self.client.get('/api/v1/products/cache-stats/')
+
+        self.assertIn(response.status_code, [401, 403])
+
+
+class ConditionalGetTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = self.create_category()
+        self.product = self.create_product(self.category, 0)
+
+    def assertRevalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        return response['ETag']
+
+    def test_product_list_not_modified(self):
+        self.assertRevalidates('/api/v1/products/')
+
+    def test_product_list_changes_with_page(self):
+        etag = self.assertRevalidates('/api/v1/products/')
+        self.create_product(self.category, 1)
+
+        response = self.client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_detail_not_modified(self):
+        url = f'/api/v1/products/{self.product.slug}/'
+        etag = self.assertRevalidates(url)
+
+        # Reviews change the payload, so they must change the validators
+        self.create_review(self.product, 0, 5)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_detail_if_modified_since(self):
+        url = f'/api/v1/products/{self.product.slug}/'
+        response = self.client.get(url)
+
+        cached = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_category_endpoints_not_modified(self):
+        self.assertRevalidates('/api/v1/categories/')
+        self.assertRevalidates(f'/api/v1/categories/{self.category.pk}/')
+        etag = self.assertRevalidates('/api/v1/categories/tree/')
+
+        self.category.name = 'Gadgets'
+        self.category.save()
+        response = self.client.get('/api/v1/categories/tree/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ProductReviewListTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = self.create_product(self.create_category(), 0)
+        for index in range(12):
+            self.create_review(self.product, index, index % 5 + 1)
+        self.hidden = self.create_review(self.product, 99, 5, is_approved=False)
+        self.url = f'/api/v1/products/{self.product.slug}/reviews/'
+
+    def collect(self, url):
+        reviews = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            reviews.extend(response.data['results'])
+            url = response.data['next']
+        return reviews
+
+    def test_detail_embeds_latest_approved_reviews(self):
+        response = self.client.get(f'/api/v1/products/{self.product.slug}/')
+
+        reviews = response.data['reviews']
+        self.assertEqual(len(reviews), 5)
+        self.assertNotIn(self.hidden.pk, [review['id'] for review in reviews])
+        expected = list(
+            Review.objects.filter(is_approved=True).order_by('-created_at', '-id')
+            .values_list('id', flat=True)[:5]
+        )
+        self.assertEqual([review['id'] for review in reviews], expected)
+
+    def test_reviews_are_paginated_newest_first(self):
+        reviews = self.collect(f'{self.url}?page_size=5')
+
+        self.assertEqual(len(reviews), 12)
+        self.assertNotIn(self.hidden.pk, [review['id'] for review in reviews])
+        created = [review['created_at'] for review in reviews]
+        self.assertEqual(created, sorted(created, reverse=True))
+
+    def test_reviews_sorted_by_rating(self):
+        reviews = self.collect(f'{self.url}?ordering=-rating&page_size=5')
+
+        expected = list(
+            Review.objects.filter(is_approved=True).order_by('-rating', '-created_at', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual([review['id'] for review in reviews], expected)
+
+    def test_rating_pages_use_keyset_not_offset(self):
+        first = self.client.get(f'{self.url}?ordering=-rating&page_size=5')
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(first.data['next'])
+        self.assertFalse(any('OFFSET' in query['sql'] for query in queries))
+
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [review['id'] for review in previous.data['results']],
+            [review['id'] for review in first.data['results']]
+        )
+        self.assertIsNone(previous.data['previous'])
+
+    def test_only_supported_orderings(self):
+        ascending = self.client.get(f'{self.url}?ordering=rating')
+        newest = self.client.get(self.url)
+
+        self.assertEqual(ascending.data['results'], newest.data['results'])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(f'{self.url}?cursor=bogus')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_review_page_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(f'{self.url}?page_size=2')
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(f'{self.url}?page_size=10')
+
+        self.assertEqual(len(small), len(large))
+
+    def test_unknown_product_returns_404(self):
+        response = self.client.get('/api/v1/products/missing/reviews/')
+
+        self.assertEqual(response.status_code, 404)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 search index is SQLite specific')
+class ProductSearchTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = self.create_category()
+        self.headphones = self.create_product(
+            self.category, 0, name='Wireless Headphones', brand='Sonic',
+            description='Over-ear audio'
+        )
+        self.speaker = self.create_product(
+            self.category, 1, name='Bluetooth Speaker', brand='Sonic',
+            description='Pairs with wireless headphones'
+        )
+        self.create_product(self.category, 2, name='Desk Lamp', brand='Lumen')
+
+    def search(self, query):
+        response = self.client.get('/api/v1/products/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [item['slug'] for item in response.data['results']]
+
+    def test_name_match_ranks_first(self):
+        self.assertEqual(self.search('wireless headphones'), ['product-0', 'product-1'])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search('headph'), ['product-0', 'product-1'])
+        self.assertEqual(self.search('lum'), ['product-2'])
+
+    def test_sku_and_brand_are_indexed(self):
+        self.assertEqual(self.search('SKU 2'), ['product-2'])
+        self.assertEqual(sorted(self.search('sonic')), ['product-0', 'product-1'])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.headphones.name = 'Studio Monitors'
+        self.headphones.description = 'Reference audio'
+        self.headphones.save()
+        self.assertEqual(self.search('monitors'), ['product-0'])
+        self.assertEqual(self.search('headphones'), ['product-1'])
+
+        self.speaker.delete()
+        self.assertEqual(self.search('headphones'), [])
+
+    def test_inactive_products_are_excluded(self):
+        Product.objects.filter(pk=self.speaker.pk).update(is_active=False)
+
+        self.assertEqual(self.search('headphones'), ['product-0'])
+
+    def test_query_without_terms_matches_nothing(self):
+        self.assertEqual(self.search('"*'), [])
+
+    def test_index_survives_trigger_loss(self):
+        drop_search_index()
+        self.assertTrue(ensure_search_index())
+
+        self.assertEqual(self.search('lamp'), ['product-2'])
+
+
+class ProductFacetTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.audio = self.create_category('Audio')
+        self.video = self.create_category('Video')
+        self.cheap = self.create_product(self.audio, 0, brand='Sonic', price=Decimal('20.00'))
+        self.sale = self.create_product(
+            self.audio, 1, brand='Sonic', price=Decimal('80.00'), discount_price=Decimal('40.00')
+        )
+        self.premium = self.create_product(self.video, 2, brand='Vista', price=Decimal('600.00'))
+        self.create_review(self.premium, 0, 4)
+        self.create_review(self.premium, 1, 5)
+
+    def counts(self, params=None):
+        response = self.client.get('/api/v1/products/facets/', params or {})
+        self.assertEqual(response.status_code, 200)
+        return {
+            facet: {entry['value']: entry['count'] for entry in entries}
+            for facet, entries in response.data.items()
+        }
+
+    def slugs(self, params):
+        response = self.client.get('/api/v1/products/', params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['slug'] for item in response.data['results'])
+
+    def assert_table_is_consistent(self):
+        stored = stored_facet_counts()
+        rebuild_facet_counts()
+        self.assertEqual(stored, stored_facet_counts())
+
+    def test_stored_counts(self):
+        counts = self.counts()
+
+        self.assertEqual(counts['brand'], {'Sonic': 2, 'Vista': 1})
+        self.assertEqual(counts['category'], {str(self.audio.pk): 2, str(self.video.pk): 1})
+        self.assertEqual(counts['price'], {'0-25': 1, '25-50': 1, '500+': 1})
+        self.assertEqual(counts['rating'], {'4': 1})
+
+    def test_unfiltered_counts_read_the_facet_table(self):
+        with self.assertNumQueries(2):
+            self.counts()
+
+    def test_filter_list_by_facets(self):
+        self.assertEqual(self.slugs({'brand': 'Sonic'}), ['product-0', 'product-1'])
+        self.assertEqual(self.slugs({'brand': 'Sonic', 'price': '25-50'}), ['product-1'])
+        self.assertEqual(self.slugs({'price': '0-25,500+'}), ['product-0', 'product-2'])
+        self.assertEqual(self.slugs({'rating': '4'}), ['product-2'])
+        self.assertEqual(self.slugs({'category_id': self.video.pk}), ['product-2'])
+
+    def test_invalid_category_ids_match_nothing(self):
+        self.assertEqual(self.slugs({'category_id': 'abc'}), [])
+        self.assertEqual(self.slugs({'category_id': f'abc,{self.video.pk}'}), ['product-2'])
+        self.assertEqual(self.counts({'category_id': 'abc'})['brand'], {})
+        response = self.client.get('/api/v1/products/featured/', {'category_id': 'abc'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_filtered_counts_ignore_own_facet(self):
+        counts = self.counts({'brand': 'Sonic'})
+
+        # Other brands stay selectable, other facets are narrowed to Sonic
+        self.assertEqual(counts['brand'], {'Sonic': 2, 'Vista': 1})
+        self.assertEqual(counts['price'], {'0-25': 1, '25-50': 1})
+        self.assertEqual(counts['rating'], {})
+
+    def test_counts_follow_product_changes(self):
+        self.cheap.brand = 'Vista'
+        self.cheap.price = Decimal('300.00')
+        self.cheap.save()
+        self.sale.is_active = False
+        self.sale.save()
+        self.create_review(self.cheap, 2, 2)
+
+        counts = self.counts()
+        self.assertEqual(counts['brand'], {'Vista': 2})
+        self.assertEqual(counts['price'], {'250-500': 1, '500+': 1})
+        self.assertEqual(counts['rating'], {'2': 1, '4': 1})
+        self.assert_table_is_consistent()
+
+    def test_counts_follow_deletes(self):
+        self.premium.delete()
+        self.audio.delete()
+
+        self.assertEqual(self.counts(), {
+            'brand': {}, 'category': {}, 'stock_status': {}, 'price': {}, 'rating': {}
+        })
+        self.assert_table_is_consistent()
+
+    def test_counts_within_search_results(self):
+        counts = self.counts({'q': 'product', 'brand': 'Vista'})
+
+        self.assertEqual(counts['brand'], {'Sonic': 2, 'Vista': 1})
+        self.assertEqual(counts['price'], {'500+': 1})
+
+
+class ProductImportTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        self.category = self.create_category()
+        self.inactive = self.create_category('Archive', is_active=False)
+        self.existing = self.create_product(self.category, 0, price=Decimal('50.00'))
+
+    def write_file(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_products', path, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_upserts_by_sku(self):
+        path = self.write_file('.csv', (
+            'sku,name,slug,description,price,discount_price,quantity,category,brand\n'
+            'SKU-0,Renamed,product-0,Updated,60.00,,5,electronics,Acme\n'
+            'SKU-1,New one,new-one,Fresh,20.00,15.00,3,electronics,\n'
+            f'SKU-2,New two,new-two,Fresh,30.00,,3,{self.category.pk},Acme\n'
+        ))
+
+        output, _ = self.run_import(path, chunk_size=2)
+
+        self.assertIn('2 created, 1 updated, 0 rejected', output)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, 'Renamed')
+        self.assertEqual(self.existing.price, Decimal('60.00'))
+        self.assertEqual(Product.objects.get(sku='SKU-1').discount_price, Decimal('15.00'))
+        self.assertEqual(Product.objects.get(sku='SKU-2').category, self.category)
+        self.assertEqual(stored_facet_counts()['brand'], {'Acme': 2})
+
+    def test_partial_rows_keep_other_columns(self):
+        self.existing.quantity = 7
+        self.existing.is_active = False
+        self.existing.discount_price = Decimal('40.00')
+        self.existing.brand = 'Acme'
+        self.existing.save()
+        path = self.write_file('.csv', (
+            'sku,name,slug,description,price,category,brand\n'
+            'SKU-0,Renamed,product-0,Updated,60.00,electronics,\n'
+        ))
+
+        output, _ = self.run_import(path)
+
+        self.assertIn('0 created, 1 updated, 0 rejected', output)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, 'Renamed')
+        self.assertEqual(self.existing.price, Decimal('60.00'))
+        self.assertEqual(self.existing.quantity, 7)
+        self.assertFalse(self.existing.is_active)
+        self.assertEqual(self.existing.discount_price, Decimal('40.00'))
+        self.assertEqual(self.existing.brand, 'Acme')
+
+    def test_jsonl_rejects_invalid_rows(self):
+        rows = [
+            {'sku': 'A', 'name': 'A', 'slug': 'a', 'description': 'd', 'price': '0', 'category': 'electronics'},
+            {'sku': 'B', 'name': 'B', 'slug': 'b', 'description': 'd', 'price': '10',
+             'discount_price': '12', 'category': 'electronics'},
+            {'sku': 'C', 'name': 'C', 'slug': 'c', 'description': 'd', 'price': '10', 'category': 'archive'},
+            {'sku': 'D', 'name': 'D', 'slug': 'product-0', 'description': 'd', 'price': '10',
+             'category': 'electronics'},
+            {'sku': 'E', 'name': 'E', 'slug': 'e', 'description': 'd', 'price': '10', 'category': 'electronics'},
+        ]
+        path = self.write_file('.jsonl', '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n')
+        rejects = self.write_file('.jsonl', '')
+
+        output, _ = self.run_import(path, rejects=rejects)
+
+        self.assertIn('1 created, 0 updated, 5 rejected', output)
+        self.assertEqual(set(Product.objects.values_list('sku', flat=True)), {'SKU-0', 'E'})
+        with open(rejects) as file:
+            reported = [json.loads(line) for line in file]
+        self.assertEqual([reject['line'] for reject in reported], [1, 2, 3, 4, 6])
+        self.assertIn('price', reported[0]['errors'])
+        self.assertIn('discount_price', reported[1]['errors'])
+        self.assertIn('category', reported[2]['errors'])
+        self.assertIn('slug', reported[3]['errors'])
+
+    def test_queries_per_chunk_are_constant(self):
+        def build(count):
+            return ''.join(
+                json.dumps({'sku': f'N-{index}', 'name': 'N', 'slug': f'n-{index}', 'description': 'd',
+                            'price': '10', 'category': 'electronics'}) + '\n'
+                for index in range(count)
+            )
+
+        with CaptureQueriesContext(connection) as small:
+            self.run_import(self.write_file('.jsonl', build(5)), chunk_size=100)
+        Product.objects.filter(sku__startswith='N-').delete()
+        with CaptureQueriesContext(connection) as large:
+            self.run_import(self.write_file('.jsonl', build(40)), chunk_size=100)
+
+        self.assertEqual(Product.objects.filter(sku__startswith='N-').count(), 40)
+        self.assertEqual(len(small), len(large))
+
+
+class ProductExportTests(ProductTestMixin, TestCase):
+
+    def setUp(self):
+        self.category = self.create_category()
+        for index in range(3):
+            self.create_product(self.category, index, brand='Acme' if index else '')
+        self.create_product(self.category, 3, is_active=False)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+
+    def export(self, **params):
+        response = self.client.get('/api/v1/products/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_jsonl_export(self):
+        rows = [json.loads(line) for line in self.export().splitlines()]
+
+        self.assertEqual([row['sku'] for row in rows], ['SKU-0', 'SKU-1', 'SKU-2'])
+        self.assertEqual(rows[0]['category'], 'electronics')
+        self.assertEqual(rows[0]['price'], '100.00')
+
+    def test_csv_export_with_filters(self):
+        lines = self.export(export_format='csv', brand='Acme').splitlines()
+
+        self.assertTrue(lines[0].startswith('sku,name,slug'))
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['SKU-1', 'SKU-2'])
+
+    def test_export_requires_admin(self):
+        response = APIClient().get('/api/v1/products/export/')
+
+        self.assertIn(response.status_code, [401, 403])
+
+    def test_export_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            self.export()
+        for index in range(10, 40):
+            self.create_product(self.category, index)
+        with CaptureQueriesContext(connection) as large:
+            self.export()
+
+        self.assertEqual(len(small), len(large))
+
+    def test_command_round_trips_through_import(self):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        output = StringIO()
+        call_command('export_products', path, include_inactive=True, chunk_size=2, stdout=output)
+        self.assertIn('Exported 4 product(s)', output.getvalue())
+
+        Product.objects.update(name='Changed')
+        call_command('import_products', path, stdout=StringIO())
+        self.assertFalse(Product.objects.filter(name='Changed').exists())
+        self.assertEqual(Product.objects.count(), 4)
+
+
+def image_upload(name='image.png', size=(4, 4)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class TemporaryMediaMixin:
+    """Uploads go to a MEDIA_ROOT that is removed after the test class"""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+
+class ProductImageBatchTests(TemporaryMediaMixin, ProductTestMixin, TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.category = self.create_category()
+        self.product = self.create_product(self.category, 0)
+        self.first = self.create_image(self.product, is_primary=True, order=0)
+        self.second = self.create_image(self.product, order=1)
+        self.third = self.create_image(self.product, order=2)
+
+    def patch_images(self, data, format='json'):
+        return self.client.patch(f'/api/v1/products/{self.product.slug}/images/', data, format=format)
+
+    def test_create_uses_one_insert_for_images(self):
+        data = {
+            'name': 'New', 'slug': 'new', 'sku': 'NEW', 'description': 'd',
+            'price': '10.00', 'category': self.category.pk,
+        }
+        for index in range(3):
+            data[f'images[{index}]image'] = image_upload(f'{index}.png')
+        data['images[2]is_primary'] = 'true'
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/v1/products/', data, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        inserts = [query for query in context if query['sql'].startswith('INSERT INTO "products_productimage"')]
+        self.assertEqual(len(inserts), 1)
+        images = list(Product.objects.get(slug='new').images.values_list('order', 'is_primary'))
+        self.assertEqual(images, [(0, False), (1, False), (2, True)])
+
+    def test_reorder_and_remove(self):
+        response = self.patch_images({'images': [
+            {'id': self.third.pk, 'is_primary': True},
+            {'id': self.first.pk},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(self.product.images.values_list('id', 'order', 'is_primary')),
+            [(self.third.pk, 0, True), (self.first.pk, 1, False)]
+        )
+        self.assertEqual([image['id'] for image in response.data['data']], [self.third.pk, self.first.pk])
+
+    def test_replace_with_upload(self):
+        response = self.patch_images({
+            'images[0]id': self.second.pk,
+            'images[1]image': image_upload(),
+            'images[1]alt_text': 'Uploaded',
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        images = list(self.product.images.values_list('alt_text', 'order', 'is_primary'))
+        self.assertEqual(images, [('', 0, True), ('Uploaded', 1, False)])
+
+    def test_replace_file_of_existing_image(self):
+        response = self.patch_images({
+            'images[0]id': self.first.pk,
+            'images[0]image': image_upload('new.png'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.first.refresh_from_db()
+        self.assertTrue(self.first.image.name.startswith('products/new'))
+        self.assertTrue(self.first.image.storage.exists(self.first.image.name))
+
+    def test_foreign_image_is_rejected(self):
+        other = self.create_image(self.create_product(self.category, 1))
+
+        response = self.patch_images({'images': [{'id': other.pk}, {'id': self.first.pk}]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('0', response.data['images'])
+        self.assertEqual(self.product.images.count(), 3)
+
+    def test_reorder_invalidates_cached_detail(self):
+        self.client.get(f'/api/v1/products/{self.product.slug}/')
+
+        self.patch_images({'images': [{'id': self.second.pk}]})
+        response = self.client.get(f'/api/v1/products/{self.product.slug}/')
+
+        self.assertEqual([image['id'] for image in response.data['images']], [self.second.pk])
+
+
+@override_settings(IMAGE_DERIVATIVES_ASYNC=False)
+class ImageDerivativeTests(TemporaryMediaMixin, ProductTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.category = self.create_category()
+        self.product = self.create_product(self.category, 0)
+
+    def upload(self, size=(800, 400)):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProductImage.objects.create(
+                product=self.product,
+                image=image_upload('photo.png', size),
+                is_primary=True
+            )
+
+    def test_variants_are_generated_after_commit(self):
+        image = self.upload()
+        image.refresh_from_db()
+
+        self.assertEqual(image.variants['source'], image.image.name)
+        self.assertEqual(sorted(image.variants['webp'], key=int), ['160', '320', '640', '800'])
+        with image.image.storage.open(image.variants['webp']['320']) as handle:
+            derivative = Image.open(handle)
+            self.assertEqual((derivative.format, derivative.size), ('WEBP', (320, 160)))
+
+    def test_nothing_runs_before_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            image = ProductImage.objects.create(product=self.product, image=image_upload())
+
+        self.assertEqual(len(callbacks), 1)
+        image.refresh_from_db()
+        self.assertEqual(image.variants, {})
+
+    def test_serializers_return_srcset(self):
+        self.upload()
+
+        listing = self.client.get('/api/v1/products/').data['results'][0]
+        detail = self.client.get(f'/api/v1/products/{self.product.slug}/').data
+
+        srcset = listing['primary_image']['srcset']
+        self.assertEqual(set(srcset), {'webp', 'jpeg'})
+        self.assertIn('-160w.webp 160w', srcset['webp'])
+        # Detail builds absolute URLs from the request
+        self.assertTrue(detail['images'][0]['srcset']['webp'].endswith(srcset['webp'].split(', ')[-1]))
+
+    def test_replaced_file_is_regenerated(self):
+        image = self.upload()
+        image.refresh_from_db()
+        first = image.variants
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = image_upload('other.png', (200, 200))
+            image.save()
+        image.refresh_from_db()
+
+        self.assertNotEqual(image.variants['source'], first['source'])
+        self.assertEqual(sorted(image.variants['webp'], key=int), ['160', '200'])
+        self.assertIsNone(generate_derivatives(ProductImage, image.pk))
+        storage = image.image.storage
+        self.assertFalse(any(storage.exists(name) for name in first['webp'].values()))
+        self.assertTrue(all(storage.exists(name) for name in image.variants['webp'].values()))
+
+    def test_deleted_image_removes_derivatives(self):
+        image = self.upload()
+        image.refresh_from_db()
+        names = list(image.variants['webp'].values()) + list(image.variants['jpeg'].values())
+        kept = self.create_image(self.product, order=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/v1/products/{self.product.slug}/images/', {'images': [{'id': kept.pk}]}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ProductImage.objects.filter(pk=image.pk).exists())
+        self.assertFalse(any(image.image.storage.exists(name) for name in names))
+
+    def test_category_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.image = image_upload('category.png', (320, 320))
+            self.category.save()
+
+        response = self.client.get(f'/api/v1/categories/{self.category.pk}/')
+
+        self.assertIn('webp', response.data['srcset'])
@@ -3,6 +3,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from apps.products.views.v1 import ProductViewSet
 from apps.products.views.v1 import CategoryViewSet
+from apps.products.views.v1 import ReviewViewSet
 
 
 router= DefaultRouter()
@@ -14,6 +15,11 @@ router.register(r'products', ProductViewSet, basename='product')
 
 
 urlpatterns = [
+    path(
+        'products/<slug:product_slug>/reviews/',
+        ReviewViewSet.as_view({'get': 'list'}),
+        name='product-reviews'
+    ),
     path('', include(router.urls))
     
 ]
@@ -1,4 +1,5 @@
 
 from .product import ProductViewSet 
 from .category import CategoryViewSet
-__all__=['ProductViewSet, CategoryViewSet ']
\ No newline at end of file
+from .review import ReviewViewSet
+__all__=['ProductViewSet', 'CategoryViewSet', 'ReviewViewSet']
\ No newline at end of file
@@ -1,9 +1,67 @@
 
+from collections import defaultdict
+
+from django.db.models import Count, Max
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from apps.products.cache import get_category_tree, set_category_tree
+from apps.products.conditional import make_etag, not_modified, set_validators
 from apps.products.models import Category
-from apps.products.serializers import CategoryListSerializer
+from apps.products.serializers import CategoryListSerializer, CategorySerializer
 
 class CategoryViewSet(viewsets.ModelViewSet):
     
     queryset= Category.objects.filter(is_active=True)
-    serializer_class= CategoryListSerializer
\ No newline at end of file
+    serializer_class= CategoryListSerializer
+
+    def get_validators(self, queryset):
+        """ETag and Last-Modified for a set of categories, from one aggregate query"""
+        summary = queryset.aggregate(last_modified=Max('updatedAt'), count=Count('id'))
+        last_modified = summary['last_modified']
+        etag = make_etag(
+            self.request.get_full_path(),
+            last_modified.isoformat() if last_modified else '',
+            summary['count']
+        )
+        return etag, last_modified
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.get_validators(queryset)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = make_etag(instance.pk, instance.updatedAt.isoformat())
+        response = not_modified(request, etag, instance.updatedAt)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag, instance.updatedAt)
+
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """Active category hierarchy, built from a single query and cached"""
+        etag, last_modified = self.get_validators(Category.objects.filter(is_active=True))
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        tree = get_category_tree()
+        if tree is None:
+            children = defaultdict(list)
+            for category in Category.objects.filter(is_active=True):
+                children[category.parent_id].append(category)
+
+            serializer = CategorySerializer(children[None], many=True, context={'children': children})
+            tree = serializer.data
+            set_category_tree(tree)
+
+        return set_validators(Response(tree), etag, last_modified)
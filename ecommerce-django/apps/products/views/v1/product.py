@@ -2,15 +2,32 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.permissions import IsAdminUser
 from django.db import transaction
+from django.http import StreamingHttpResponse
 
+from apps.products.conditional import make_etag, not_modified, set_validators
+from apps.products.cache import get_product_detail, get_product_detail_stats, set_product_detail
+from apps.products.export import CONTENT_TYPES, RENDERERS, export_rows
+from apps.products.facets import (
+    computed_facet_counts,
+    describe_facets,
+    filter_by_facets,
+    parse_facet_filters,
+    stored_facet_counts
+)
 from apps.products.models import Category, Product
+from apps.products.pagination import ProductCursorPagination, ProductSearchPagination
+from apps.products.search import search_products
 from apps.products.serializers import (
     ProductDetailSerializer,
     ProductCreateUpdateSerializer,
     ProductCreateSerializer,
-    ProductListSerializer
+    ProductListSerializer,
+    ProductImageBatchSerializer,
+    ProductImageSerializer
 )
+from apps.products.serializers.product import latest_reviews_prefetch, primary_image_prefetch
 
 
 class ProductViewSet(viewsets.ModelViewSet):
@@ -18,10 +35,62 @@ class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.filter(is_active=True)
     lookup_field = 'slug'
     parser_classes = [MultiPartParser, FormParser, JSONParser]
-    ordering = ['-created_at']
+    pagination_class = ProductCursorPagination
+    ordering = ['-created_at', 'id']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['list', 'featured']:
+            queryset = self.filter_by_category(queryset)
+            queryset = filter_by_facets(queryset, self.facet_filters)
+            if self.search_query:
+                queryset = search_products(queryset, self.search_query)
+            # Load category and primary image in a fixed number of queries
+            queryset = queryset.select_related('category').prefetch_related(
+                primary_image_prefetch()
+            )
+        elif self.action == 'retrieve':
+            # Rating summary is read from the denormalized product columns
+            queryset = queryset.select_related('category').prefetch_related(
+                'images',
+                latest_reviews_prefetch()
+            )
+        elif self.action == 'images':
+            queryset = queryset.prefetch_related('images')
+        return queryset
+
+    @property
+    def search_query(self):
+        return self.request.query_params.get('q', '').strip()
+
+    @property
+    def facet_filters(self):
+        return parse_facet_filters(self.request.query_params)
+
+    @property
+    def paginator(self):
+        # Ranked search results cannot be keyset paginated on created_at
+        if not hasattr(self, '_paginator') and self.search_query:
+            self._paginator = ProductSearchPagination()
+        return super().paginator
+
+    def filter_by_category(self, queryset):
+        """Apply ?category=<slug> and optionally ?include_descendants=1"""
+        slug = self.request.query_params.get('category')
+        if not slug:
+            return queryset
+
+        category = Category.objects.filter(slug=slug, is_active=True).first()
+        if category is None:
+            return queryset.none()
+
+        include_descendants = self.request.query_params.get('include_descendants', '').lower()
+        if include_descendants in ['1', 'true', 'yes']:
+            return queryset.filter(category__in=category.get_descendants())
+        return queryset.filter(category=category)
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'featured']:
             return ProductListSerializer
         if self.action == 'create':
             return ProductCreateSerializer
@@ -47,10 +116,62 @@ class ProductViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.get_conditional_page_response(queryset)
+
+    def get_conditional_page_response(self, queryset):
+        """
+        Paginate, then answer 304 from the page's updated_at validators
+        before anything is serialized.
+        """
+        page = self.paginate_queryset(queryset)
+        etag = make_etag(
+            self.request.get_full_path(),
+            *[(product.pk, product.updated_at.isoformat(), product.category.updatedAt.isoformat())
+              for product in page]
+        )
+        last_modified = max(
+            (max(product.updated_at, product.category.updatedAt) for product in page),
+            default=None
+        )
+
+        response = not_modified(self.request, etag, last_modified)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        return set_validators(response, etag, last_modified)
+
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        slug = kwargs[self.lookup_field]
+
+        validators = (
+            self.get_queryset().filter(slug=slug)
+            .values_list('updated_at', 'category__updatedAt')
+            .first()
+        )
+        etag = last_modified = None
+        if validators:
+            etag = make_etag(slug, *[value.isoformat() for value in validators])
+            last_modified = max(validators)
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+
+        origin = f'{request.scheme}://{request.get_host()}'
+        data = get_product_detail(slug, origin)
+        if data is None:
+            instance = self.get_object()
+            serializer = self.get_serializer(instance)
+            data = serializer.data
+            set_product_detail(slug, origin, data)
+
+        response = Response(data)
+        if etag:
+            set_validators(response, etag, last_modified)
+        return response
 
     def get_permissions(self):
         return super().get_permissions()
@@ -61,8 +182,62 @@ class ProductViewSet(viewsets.ModelViewSet):
         instance.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['get'], url_path='cache-stats', permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        return Response(get_product_detail_stats())
+
     @action(detail=False, methods=['get'])
     def featured(self, request):
         featured = self.get_queryset().filter(is_featured=True)
-        serializer = self.get_serializer(featured, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return self.get_conditional_page_response(featured)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Product counts per facet value. The unfiltered catalog is answered from
+        the precomputed facet table; a filtered one is grouped on demand.
+        """
+        selected = self.facet_filters
+        if not selected and not self.search_query and not request.query_params.get('category'):
+            counts = stored_facet_counts()
+        else:
+            queryset = self.filter_by_category(super().get_queryset())
+            if self.search_query:
+                queryset = search_products(queryset, self.search_query)
+            counts = computed_facet_counts(queryset, selected)
+        return Response(describe_facets(counts))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Stream the active catalog as JSONL (default) or CSV with
+        ?export_format=csv. Category and facet filters apply.
+        """
+        export_format = request.query_params.get('export_format', 'jsonl')
+        if export_format not in RENDERERS:
+            return Response(
+                {'export_format': [f'Choose one of: {", ".join(sorted(RENDERERS))}.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = filter_by_facets(self.filter_by_category(super().get_queryset()), self.facet_filters)
+        response = StreamingHttpResponse(
+            RENDERERS[export_format](export_rows(queryset)),
+            content_type=CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{export_format}"'
+        return response
+
+    @action(detail=True, methods=['patch'], url_path='images')
+    def images(self, request, slug=None):
+        """Reorder, replace and remove a product's images in one request"""
+        product = self.get_object()
+        serializer = ProductImageBatchSerializer(data=request.data, context={'product': product})
+        serializer.is_valid(raise_exception=True)
+        images = serializer.save()
+
+        return Response({
+            "success": True,
+            "message": "Product images updated successfully.",
+            "data": ProductImageSerializer(images, many=True, context={'request': request}).data
+        })
@@ -1,8 +1,28 @@
 
-from rest_framework import viewsets, status
-from rest_framework.response import Response
-from apps.products.models import Review
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets
+from apps.products.models import Product, Review
+from apps.products.pagination import ReviewCursorPagination
+from apps.products.serializers import ReviewSerializer
 
 class ReviewViewSet(viewsets.ModelViewSet):
+    """
+    Approved reviews of a single product.
+
+    Endpoints:
+    - GET /products/{slug}/reviews/                   - Newest reviews first
+    - GET /products/{slug}/reviews/?ordering=-rating  - Highest rated first
+    """
+
     queryset= Review.objects.filter(is_approved=True)
-    
+    serializer_class= ReviewSerializer
+    # Ordering (-created_at or -rating) is applied by the keyset pagination
+    pagination_class= ReviewCursorPagination
+
+    def get_queryset(self):
+        product = get_object_or_404(
+            Product.objects.only('id'),
+            slug=self.kwargs['product_slug'],
+            is_active=True
+        )
+        return super().get_queryset().filter(product=product).select_related('user')
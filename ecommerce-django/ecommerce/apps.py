@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class EcommerceConfig(AppConfig):
+    """Project-level wiring that does not belong to a single app"""
+
+    name = 'ecommerce'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from ecommerce.db import apply_sqlite_pragmas
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='ecommerce.apply_sqlite_pragmas')
@@ -0,0 +1,97 @@
+"""
+Database profiles selected with environment variables.
+
+DB_PROFILE=baseline (default) is Django's stock SQLite setup, so development
+commands leave the checked-in database file as it is. DB_PROFILE=tuned, meant
+for deployments, keeps persistent, health-checked connections and applies the
+SQLite pragmas below on every new connection; journal_mode=WAL is stored in
+the database file itself. Individual values can be overridden with the DB_*
+variables read in database_profile().
+"""
+
+import re
+
+
+PROFILES = {
+    'baseline': {
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'TRANSACTION_MODE': None,
+        'PRAGMAS': {},
+    },
+    'tuned': {
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        # Take the write lock when a transaction starts instead of failing to
+        # upgrade a read lock halfway through
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        'PRAGMAS': {
+            # Readers keep reading while a writer commits
+            'journal_mode': 'WAL',
+            # Durable across application crashes; fsync only at checkpoints
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            # Milliseconds to wait for a lock before raising "database is locked"
+            'busy_timeout': 5000,
+            # Negative values are KiB, so 64 MiB of page cache per connection
+            'cache_size': -64 * 1024,
+        },
+    },
+}
+
+PRAGMA_ENV = {
+    'journal_mode': 'DB_SQLITE_JOURNAL_MODE',
+    'synchronous': 'DB_SQLITE_SYNCHRONOUS',
+    'mmap_size': 'DB_SQLITE_MMAP_SIZE',
+    'busy_timeout': 'DB_SQLITE_BUSY_TIMEOUT',
+    'cache_size': 'DB_SQLITE_CACHE_SIZE',
+}
+
+_PRAGMA_VALUE = re.compile(r'^(-?\d+|[A-Za-z_]+)$')
+
+
+def _flag(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_profile(default_name, environ):
+    """DATABASES['default'] for the profile named by DB_PROFILE"""
+    profile_name = environ.get('DB_PROFILE', 'baseline')
+    if profile_name not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile_name!r}, choose one of: {', '.join(PROFILES)}")
+    profile = PROFILES[profile_name]
+
+    pragmas = dict(profile['PRAGMAS'])
+    for pragma, variable in PRAGMA_ENV.items():
+        if environ.get(variable):
+            pragmas[pragma] = environ[variable]
+    for pragma, value in pragmas.items():
+        if not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"Invalid value {value!r} for SQLite pragma {pragma}")
+
+    options = {}
+    transaction_mode = environ.get('DB_SQLITE_TRANSACTION_MODE', profile['TRANSACTION_MODE'])
+    if transaction_mode:
+        options['transaction_mode'] = transaction_mode.upper()
+
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': environ.get('DB_NAME', default_name),
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', profile['CONN_MAX_AGE'])),
+        'CONN_HEALTH_CHECKS': _flag(environ.get('DB_CONN_HEALTH_CHECKS', profile['CONN_HEALTH_CHECKS'])),
+        'OPTIONS': options,
+        # Not a Django key, read by apply_sqlite_pragmas
+        'PRAGMAS': pragmas,
+    }
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver applying the profile's PRAGMAS"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS') or {}
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
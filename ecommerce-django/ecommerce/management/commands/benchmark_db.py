@@ -0,0 +1,152 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+
+from ecommerce.db import PROFILES, database_profile
+
+
+# Key inside the scratch ConnectionHandler, unrelated to settings.DATABASES
+ALIAS = 'default'
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent cart-style reads and writes against a scratch SQLite "
+        "file once per database profile and compare throughput. The project "
+        "database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=20_000, help='Cart items seeded per run')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['readers'] < 0 or options['writers'] < 0 or options['readers'] + options['writers'] == 0:
+            raise CommandError("Need at least one reader or writer.")
+
+        self.stdout.write(
+            f"{options['readers']} reader(s), {options['writers']} writer(s), "
+            f"{options['seconds']:g}s per profile"
+        )
+        self.stdout.write(f"{'profile':<10}{'reads/s':>10}{'writes/s':>10}{'locked':>8}{'p95 write ms':>14}")
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in options['profiles']:
+                path = os.path.join(directory, f'{profile}.sqlite3')
+                result = self.run_profile(profile, path, options)
+                self.stdout.write(
+                    f"{profile:<10}{result['reads'] / options['seconds']:>10.0f}"
+                    f"{result['writes'] / options['seconds']:>10.0f}"
+                    f"{result['locked']:>8}{result['p95']:>14.1f}"
+                )
+
+    def run_profile(self, profile, path, options):
+        # Environment overrides apply to every profile so they can be compared
+        environ = {key: value for key, value in os.environ.items() if key != 'DB_NAME'}
+        environ['DB_PROFILE'] = profile
+        connections = ConnectionHandler({ALIAS: database_profile(path, environ)})
+
+        self.populate(connections[ALIAS], options['rows'], options['seed'])
+        connections.close_all()
+
+        stop = threading.Event()
+        result = {'reads': 0, 'writes': 0, 'locked': 0, 'write_ms': []}
+        lock = threading.Lock()
+
+        def worker(index, write):
+            rng = random.Random(options['seed'] + index)
+            reads = writes = locked = 0
+            write_ms = []
+            while not stop.is_set():
+                # ConnectionHandler is thread-local, one connection per worker
+                connection = connections[ALIAS]
+                started = time.perf_counter()
+                try:
+                    if write:
+                        self.write(connection, rng, options['rows'])
+                        writes += 1
+                        write_ms.append((time.perf_counter() - started) * 1000)
+                    else:
+                        self.read(connection, rng, options['rows'])
+                        reads += 1
+                except OperationalError:
+                    locked += 1
+                # What request_finished does: reconnect unless CONN_MAX_AGE allows reuse
+                connection.close_if_unusable_or_obsolete()
+            connections.close_all()
+            with lock:
+                result['reads'] += reads
+                result['writes'] += writes
+                result['locked'] += locked
+                result['write_ms'] += write_ms
+
+        threads = [
+            threading.Thread(target=worker, args=(index, index < options['writers']))
+            for index in range(options['writers'] + options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        write_ms = sorted(result['write_ms'])
+        result['p95'] = write_ms[int(len(write_ms) * 0.95)] if write_ms else 0.0
+        return result
+
+    def populate(self, connection, rows, seed):
+        rng = random.Random(seed)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE bench_cart_item ("
+                "id INTEGER PRIMARY KEY, cart_id INTEGER NOT NULL, product_id INTEGER NOT NULL, "
+                "quantity INTEGER NOT NULL, price REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            cursor.execute("CREATE INDEX bench_cart_item_cart ON bench_cart_item (cart_id)")
+            cursor.executemany(
+                "INSERT INTO bench_cart_item (cart_id, product_id, quantity, price, updated_at) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [
+                    (index // 5, rng.randrange(5000), rng.randint(1, 5), rng.uniform(1, 500), time.time())
+                    for index in range(rows)
+                ]
+            )
+
+    def read(self, connection, rng, rows):
+        """Cart summary: item count and total of one cart"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*), SUM(quantity * price) FROM bench_cart_item WHERE cart_id = %s",
+                [rng.randrange(rows // 5)]
+            )
+            cursor.fetchone()
+
+    def write(self, connection, rng, rows):
+        """Add to cart: read a line, then bump the cart's lines in one transaction"""
+        cart_id = rng.randrange(rows // 5)
+        with connection.cursor() as cursor:
+            # Same statement atomic() issues for this connection's transaction_mode
+            cursor.execute(f"BEGIN {connection.transaction_mode or ''}")
+            try:
+                cursor.execute(
+                    "SELECT id, quantity FROM bench_cart_item WHERE cart_id = %s LIMIT 1", [cart_id]
+                )
+                cursor.fetchone()
+                cursor.execute(
+                    "UPDATE bench_cart_item SET quantity = quantity + 1, updated_at = %s WHERE cart_id = %s",
+                    [time.time(), cart_id]
+                )
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from ecommerce.db import database_profile
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,7 @@ INSTALLED_APPS = [
     'apps.products',
     'apps.cart',
     'apps.orders',
+    'ecommerce.apps.EcommerceConfig',
     'silk'
 ]
 
@@ -79,14 +83,27 @@ WSGI_APPLICATION = 'ecommerce.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# DB_PROFILE=baseline (default) or tuned for deployments, plus DB_* overrides, see ecommerce/db.py
 
 DATABASES = {
+    'default': database_profile(BASE_DIR / 'db.sqlite3', os.environ),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Product detail and category tree caches use PRODUCT_CACHE_ALIAS; point it at a
+# shared backend (Redis, Memcached) in production so invalidation reaches every worker.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+PRODUCT_CACHE_ALIAS = 'default'
+PRODUCT_DETAIL_CACHE_TIMEOUT = 5 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,6 +146,25 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resized and WebP variants of uploaded images, generated off the request thread
+IMAGE_DERIVATIVE_WIDTHS = [160, 320, 640, 1280]
+IMAGE_DERIVATIVE_WORKERS = 2
+IMAGE_DERIVATIVES_ASYNC = True
+
+# Catalog pagination
+# PRODUCT_PAGE_SIZE is the default page, clients may request up to PRODUCT_MAX_PAGE_SIZE
+
+PRODUCT_PAGE_SIZE = 20
+PRODUCT_MAX_PAGE_SIZE = 100
+
+# Reviews embedded in product detail, the rest are paginated per product
+PRODUCT_DETAIL_REVIEW_LIMIT = 5
+REVIEW_PAGE_SIZE = 10
+REVIEW_MAX_PAGE_SIZE = 50
+
+# Anonymous carts idle for longer than this are deleted by purge_stale_carts
+CART_IDLE_DAYS = 30
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,65 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.utils import ConnectionHandler
+from django.test import TestCase
+
+from ecommerce.db import database_profile
+
+
+class DatabaseProfileTests(TestCase):
+
+    def test_baseline_profile_is_the_default(self):
+        profile = database_profile('db.sqlite3', {})
+        self.assertEqual(profile['CONN_MAX_AGE'], 0)
+        self.assertEqual(profile['OPTIONS'], {})
+        self.assertEqual(profile['PRAGMAS'], {})
+
+    def test_tuned_profile(self):
+        profile = database_profile('db.sqlite3', {'DB_PROFILE': 'tuned'})
+        self.assertEqual(profile['CONN_MAX_AGE'], 60)
+        self.assertTrue(profile['CONN_HEALTH_CHECKS'])
+        self.assertEqual(profile['OPTIONS'], {'transaction_mode': 'IMMEDIATE'})
+        self.assertEqual(profile['PRAGMAS']['journal_mode'], 'WAL')
+
+    def test_environment_overrides(self):
+        profile = database_profile('db.sqlite3', {
+            'DB_NAME': '/tmp/other.sqlite3',
+            'DB_CONN_MAX_AGE': '300',
+            'DB_SQLITE_BUSY_TIMEOUT': '1000',
+        })
+        self.assertEqual(profile['NAME'], '/tmp/other.sqlite3')
+        self.assertEqual(profile['CONN_MAX_AGE'], 300)
+        self.assertFalse(profile['CONN_HEALTH_CHECKS'])
+        self.assertEqual(profile['OPTIONS'], {})
+        self.assertEqual(profile['PRAGMAS'], {'busy_timeout': '1000'})
+
+    def test_invalid_values_are_rejected(self):
+        with self.assertRaises(ValueError):
+            database_profile('db.sqlite3', {'DB_PROFILE': 'fast'})
+        with self.assertRaises(ValueError):
+            database_profile('db.sqlite3', {'DB_SQLITE_SYNCHRONOUS': 'OFF; DROP TABLE cart'})
+
+    def test_pragmas_applied_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            handler = ConnectionHandler({
+                'default': database_profile(os.path.join(directory, 'profile.sqlite3'), {'DB_PROFILE': 'tuned'}),
+            })
+            try:
+                with handler['default'].cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 5000)
+            finally:
+                handler.close_all()
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_db', seconds=0.2, readers=1, writers=1, rows=100, stdout=out)
+        self.assertIn('baseline', out.getvalue())
+        self.assertIn('tuned', out.getvalue())
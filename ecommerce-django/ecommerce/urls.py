@@ -24,7 +24,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('apps.products.urls')),
     path('api/v1/', include('apps.cart.urls')),
-    # path('api/v1/orders/', include('apps.orders.urls')),
+    path('api/v1/', include('apps.orders.urls')),
     # path('api/v1/accounts/', include('apps.accounts.urls'))
 
 